@@ -8,7 +8,8 @@ This example shows how to build a sophisticated research workflow that combines:
 
 We've used the following tools as they're available for free:
 - DuckDuckGoTools: Searches the web for relevant articles
-- Newspaper4kTools: Scrapes and processes article content
+- newspaper4k: Extracts article content locally (see article_extraction.py)
+- Newspaper4kTools: Scrapes and processes the articles that can't be extracted locally
 
 Example research topics to try:
 - "What are the latest developments in quantum computing?"
@@ -18,11 +19,17 @@ Example research topics to try:
 - "Explore the latest findings in longevity research"
 
 Run `pip install openai duckduckgo-search newspaper4k lxml_html_clean sqlalchemy agno` to install dependencies.
+Optionally `pip install readability-lxml` for a second local extractor.
 """
 
 import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict
 from textwrap import dedent
-from typing import Dict, Iterator, Optional
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
 
 from agno.agent import Agent
 from agno.models.openai import OpenAIChat
@@ -34,6 +41,18 @@ from agno.utils.pprint import pprint_run_response
 from agno.workflow import RunEvent, RunResponse, Workflow
 from pydantic import BaseModel, Field
 
+from article_extraction import extract_article
+from research_cache import (
+    canonical_topic,
+    fetch_page,
+    get_article_store,
+    get_research_cache,
+)
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
 
 class Article(BaseModel):
     title: str = Field(..., description="Title of the article.")
@@ -87,7 +106,9 @@ class ResearchReportGenerator(Workflow):
     )
 
     article_scraper: Agent = Agent(
-        model=OpenAIChat(id="gpt-4o"),
+        # Bounded so a scrape that timed out doesn't keep its thread (and the process)
+        # waiting on the API; Newspaper4kTools' downloads time out after 7s by default
+        model=OpenAIChat(id="gpt-4o", timeout=60),
         tools=[Newspaper4kTools()],
         description=dedent("""\
         You are ContentBot-X, an expert at extracting and structuring academic content.\
@@ -175,6 +196,30 @@ class ResearchReportGenerator(Workflow):
         markdown=True,
     )
 
+    # Scraping is the slowest step, so articles are scraped in parallel: at most
+    # `max_scrape_workers` at once and `max_requests_per_host` per site, giving up on
+    # any article that takes longer than `scrape_timeout` seconds. Set the workers to 1
+    # to scrape one article at a time. Every page download gives up after
+    # `request_timeout` seconds, so the threads of abandoned scrapes end soon after.
+    max_scrape_workers: int = 5
+    max_requests_per_host: int = 2
+    scrape_timeout: float = 90.0
+    request_timeout: float = 20.0
+    # Scraped articles are also kept by URL in this database, shared across topics and
+    # sessions, so a page found again for another topic isn't scraped again
+    article_db_file: str = "tmp/research_articles.db"
+    # Extract articles with newspaper4k and only ask the article_scraper agent (one LLM
+    # call per article) for the pages where the local extraction looks wrong
+    extract_locally: bool = True
+    min_article_words: int = 150
+    # Reports, search results and the articles used for each topic are cached here, one
+    # row per item, rather than in the workflow's session state
+    cache_db_file: str = "tmp/research_cache.db"
+    # Topics are matched ignoring case, punctuation, stopwords and word endings. Search
+    # results are also reused from a past topic with at least this share of its words in
+    # the same order (`topic_similarity`); set it to 1 to only reuse the same topic's
+    search_reuse_threshold: float = 0.7
+
     def run(
         self,
         topic: str,
@@ -207,7 +252,7 @@ class ResearchReportGenerator(Workflow):
             - Scrape new articles that aren't in the cache.
         4. Generate the final report using the scraped article contents.
 
-        The function utilizes the `session_state` to store and retrieve cached data.
+        Cached data is kept in the research cache and article store (research_cache.py).
         """
         logger.info(f"Generating a report on: {topic}")
 
@@ -234,7 +279,7 @@ class ResearchReportGenerator(Workflow):
 
         # Scrape the search results
         scraped_articles: Dict[str, ScrapedArticle] = self.scrape_articles(
-            search_results, use_scrape_cache
+            topic, search_results, use_scrape_cache
         )
 
         # Write a research report
@@ -242,45 +287,70 @@ class ResearchReportGenerator(Workflow):
 
     def get_cached_report(self, topic: str) -> Optional[str]:
         logger.info("Checking if cached report exists")
-        return self.session_state.get("reports", {}).get(topic)
+        return get_research_cache(self.cache_db_file).get_report(topic)
 
     def add_report_to_cache(self, topic: str, report: str):
         logger.info(f"Saving report for topic: {topic}")
-        self.session_state.setdefault("reports", {})
-        self.session_state["reports"][topic] = report
-        # Save the report to the storage
-        self.write_to_storage()
+        get_research_cache(self.cache_db_file).put_report(topic, report)
 
     def get_cached_search_results(self, topic: str) -> Optional[SearchResults]:
         logger.info("Checking if cached search results exist")
-        return self.session_state.get("search_results", {}).get(topic)
+        cache = get_research_cache(self.cache_db_file)
+        articles = cache.get_search_results(topic)
+        if articles is None and self.search_reuse_threshold < 1:
+            similar = cache.similar_topic(topic, self.search_reuse_threshold)
+            if similar is not None:
+                similar_topic, similarity = similar
+                logger.info(
+                    f"Reusing search results for similar topic: {similar_topic} "
+                    f"(similarity {similarity:.2f})"
+                )
+                articles = cache.get_search_results(similar_topic)
+        return SearchResults(articles=articles) if articles is not None else None
 
     def add_search_results_to_cache(self, topic: str, search_results: SearchResults):
         logger.info(f"Saving search results for topic: {topic}")
-        self.session_state.setdefault("search_results", {})
-        self.session_state["search_results"][topic] = search_results.model_dump()
-        # Save the search results to the storage
-        self.write_to_storage()
+        get_research_cache(self.cache_db_file).put_search_results(
+            topic, [article.model_dump() for article in search_results.articles]
+        )
 
     def get_cached_scraped_articles(
         self, topic: str
     ) -> Optional[Dict[str, ScrapedArticle]]:
         logger.info("Checking if cached scraped articles exist")
-        return self.session_state.get("scraped_articles", {}).get(topic)
+        urls = get_research_cache(self.cache_db_file).get_article_urls(topic)
+        article_store = get_article_store(self.article_db_file)
+        host_limits = self.host_limits(urls)
+
+        def get_stored(url: str) -> Optional[Dict[str, Any]]:
+            # Stale articles are revalidated over the network, so like scraping
+            with host_limits[host_of(url)]:
+                return article_store.get(url, self.request_timeout)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_scrape_workers)) as pool:
+            stored_articles = list(pool.map(get_stored, urls))
+        if any(stored is None for stored in stored_articles):
+            # Expired or changed since; scrape_articles fetches it again
+            return None
+        scraped_articles: Dict[str, ScrapedArticle] = {
+            url: ScrapedArticle.model_validate(stored)
+            for url, stored in zip(urls, stored_articles)
+        }
+        return scraped_articles or None
 
     def add_scraped_articles_to_cache(
         self, topic: str, scraped_articles: Dict[str, ScrapedArticle]
     ):
+        # The articles themselves are already in the article store
         logger.info(f"Saving scraped articles for topic: {topic}")
-        self.session_state.setdefault("scraped_articles", {})
-        self.session_state["scraped_articles"][topic] = scraped_articles
-        # Save the scraped articles to the storage
-        self.write_to_storage()
+        get_research_cache(self.cache_db_file).put_article_urls(
+            topic, list(scraped_articles)
+        )
 
     def get_search_results(
         self, topic: str, use_search_cache: bool, num_attempts: int = 3
     ) -> Optional[SearchResults]:
-        # Get cached search_results from the session state if use_search_cache is True
+        # Get cached search_results from the research cache if use_search_cache is True
         if use_search_cache:
             try:
                 search_results_from_cache = self.get_cached_search_results(topic)
@@ -322,11 +392,11 @@ class ResearchReportGenerator(Workflow):
         return None
 
     def scrape_articles(
-        self, search_results: SearchResults, use_scrape_cache: bool
+        self, topic: str, search_results: SearchResults, use_scrape_cache: bool
     ) -> Dict[str, ScrapedArticle]:
         scraped_articles: Dict[str, ScrapedArticle] = {}
 
-        # Get cached scraped_articles from the session state if use_scrape_cache is True
+        # Get the topic's cached scraped_articles if use_scrape_cache is True
         if use_scrape_cache:
             try:
                 scraped_articles_from_cache = self.get_cached_scraped_articles(topic)
@@ -340,28 +410,107 @@ class ResearchReportGenerator(Workflow):
                 logger.warning(f"Could not read scraped articles from cache: {e}")
 
         # Scrape the articles that are not in the cache
+        to_scrape = []
         for article in search_results.articles:
             if article.url in scraped_articles:
                 logger.info(f"Found scraped article in cache: {article.url}")
                 continue
+            to_scrape.append(article)
+        scraped = self.scrape_in_parallel(to_scrape, use_scrape_cache)
 
-            article_scraper_response: RunResponse = self.article_scraper.run(
-                article.url
-            )
-            if (
-                article_scraper_response is not None
-                and article_scraper_response.content is not None
-                and isinstance(article_scraper_response.content, ScrapedArticle)
-            ):
-                scraped_articles[article_scraper_response.content.url] = (
-                    article_scraper_response.content
-                )
-                logger.info(f"Scraped article: {article_scraper_response.content.url}")
+        # Keep the search results' order, which the writer sees as source order
+        for article in to_scrape:
+            scraped_article = scraped.get(article.url)
+            if scraped_article is not None:
+                scraped_articles[article.url] = scraped_article
 
-        # Save the scraped articles in the session state
+        # Remember which articles the topic used
         self.add_scraped_articles_to_cache(topic, scraped_articles)
         return scraped_articles
 
+    def host_limits(self, urls: List[str]) -> Dict[str, threading.BoundedSemaphore]:
+        """One semaphore per site in `urls`, allowing `max_requests_per_host` each."""
+        return {
+            host: threading.BoundedSemaphore(self.max_requests_per_host)
+            for host in {host_of(url) for url in urls}
+        }
+
+    def scrape_in_parallel(
+        self, articles: list[Article], use_article_store: bool = True
+    ) -> Dict[str, ScrapedArticle]:
+        """Scrape `articles` concurrently; returns the ones that succeeded by URL."""
+        article_store = get_article_store(self.article_db_file)
+        host_limits = self.host_limits([article.url for article in articles])
+        started_at: Dict[str, float] = {}
+
+        def scrape(article: Article) -> Optional[ScrapedArticle]:
+            with host_limits[host_of(article.url)]:
+                started_at[article.url] = time.monotonic()
+                if use_article_store:
+                    stored = article_store.get(article.url, self.request_timeout)
+                    if stored is not None:
+                        logger.info(f"Found scraped article in store: {article.url}")
+                        return ScrapedArticle.model_validate(stored)
+                # Also tells the article store which version of the page this is
+                html, version = fetch_page(article.url, self.request_timeout)
+                scraped_article = None
+                if self.extract_locally and html is not None:
+                    extracted = extract_article(
+                        article.url, html, self.min_article_words, self.request_timeout
+                    )
+                    if extracted is not None:
+                        logger.info(f"Extracted article locally: {article.url}")
+                        scraped_article = ScrapedArticle(**asdict(extracted))
+                if scraped_article is None:
+                    # Agents keep per-run state, so every thread gets its own copy
+                    scraper = self.article_scraper.deep_copy()
+                    response: RunResponse = scraper.run(article.url)
+                    if (
+                        response is not None
+                        and response.content is not None
+                        and isinstance(response.content, ScrapedArticle)
+                    ):
+                        logger.info(f"Scraped article: {response.content.url}")
+                        scraped_article = response.content
+                if scraped_article is not None:
+                    article_store.put(
+                        article.url, scraped_article.model_dump(), version
+                    )
+                    return scraped_article
+            logger.warning(f"Could not scrape article: {article.url}")
+            return None
+
+        scraped: Dict[str, ScrapedArticle] = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, self.max_scrape_workers))
+        try:
+            futures: Dict[Future, Article] = {
+                executor.submit(scrape, article): article for article in articles
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    article = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        logger.warning(f"Failed to scrape {article.url}: {e}")
+                        continue
+                    if result is not None:
+                        scraped[article.url] = result
+                # Stop waiting for articles that have been scraping for too long
+                now = time.monotonic()
+                for future in list(pending):
+                    article = futures[future]
+                    started = started_at.get(article.url)
+                    if started is not None and now - started > self.scrape_timeout:
+                        logger.warning(f"Timed out scraping article: {article.url}")
+                        pending.discard(future)
+        finally:
+            # Don't block on scrapes that timed out; their requests time out soon
+            executor.shutdown(wait=False, cancel_futures=True)
+        return scraped
+
     def write_research_report(
         self, topic: str, scraped_articles: Dict[str, ScrapedArticle]
     ) -> Iterator[RunResponse]:
@@ -403,8 +552,8 @@ if __name__ == "__main__":
         default="Agentic AI open source python package and interface",
     )
 
-    # Convert the topic to a URL-safe string for use in session_id
-    url_safe_topic = topic.lower().replace(" ", "-")
+    # Rephrasings of the same topic share a session; the canonical topic is URL-safe
+    url_safe_topic = canonical_topic(topic)
 
     # Initialize the news report generator workflow
     generate_research_report = ResearchReportGenerator(
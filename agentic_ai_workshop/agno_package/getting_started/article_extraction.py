@@ -0,0 +1,259 @@
+"""Local article extraction for the research workflow (09_research_workflow.py).
+
+Turning a web page into a clean markdown article doesn't need an LLM most of the time:
+newspaper4k finds the article body (readability-lxml is tried too, if installed) and
+`html_to_markdown` converts it. `extract_article` only returns articles that pass a few
+quality checks, so the workflow can fall back to its LLM scraper for the pages that are
+paywalled, blocked or mostly navigation.
+"""
+
+import html as html_lib
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import urljoin
+
+from agno.utils.log import logger
+from newspaper import Article as NewspaperArticle
+
+try:
+    from readability import Document
+except ImportError:
+    Document = None
+
+# Text that means we got a wall or an error page instead of the article
+BLOCKED_MARKERS = (
+    "subscribe to continue",
+    "subscribe to read",
+    "to continue reading",
+    "sign in to continue",
+    "create a free account",
+    "enable javascript",
+    "access denied",
+    "are you a robot",
+    "verify you are human",
+    "page not found",
+)
+
+
+@dataclass
+class ExtractedArticle:
+    title: str
+    url: str
+    summary: Optional[str]
+    content: str
+
+
+class _MarkdownConverter(HTMLParser):
+    _BLOCKS = {"p", "div", "section", "article", "table", "tr", "figure", "header"}
+    _SKIP = {"script", "style", "noscript", "nav", "footer", "aside", "form", "svg"}
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.out: List[str] = []
+        self.lists: List[List[int]] = []
+        self.href: Optional[str] = None
+        self.skip_depth = 0
+        self.pre = False
+
+    def _newline(self, count: int = 2) -> None:
+        tail = "".join(self.out[-2:])
+        missing = count - (len(tail) - len(tail.rstrip("\n")))
+        if self.out and missing > 0:
+            self.out.append("\n" * missing)
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self.skip_depth += 1
+        if self.skip_depth:
+            return
+        if re.fullmatch(r"h[1-6]", tag):
+            self._newline()
+            self.out.append("#" * int(tag[1]) + " ")
+        elif tag in self._BLOCKS:
+            self._newline()
+        elif tag == "br":
+            self.out.append("  \n")
+        elif tag in ("ul", "ol"):
+            self._newline(1 if self.lists else 2)
+            self.lists.append([0] if tag == "ol" else [])
+        elif tag == "li":
+            self._newline(1)
+            indent = "  " * (len(self.lists) - 1)
+            numbering = self.lists[-1] if self.lists else []
+            if numbering:
+                numbering[0] += 1
+                self.out.append(f"{indent}{numbering[0]}. ")
+            else:
+                self.out.append(f"{indent}- ")
+        elif tag == "blockquote":
+            self._newline()
+            self.out.append("> ")
+        elif tag == "pre":
+            self._newline()
+            self.out.append("```\n")
+            self.pre = True
+        elif tag == "code" and not self.pre:
+            self.out.append("`")
+        elif tag in ("strong", "b"):
+            self.out.append("**")
+        elif tag in ("em", "i"):
+            self.out.append("*")
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href and not href.startswith(("#", "javascript:")):
+                self.href = urljoin(self.base_url, href)
+                self.out.append("[")
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth:
+            return
+        if re.fullmatch(r"h[1-6]", tag) or tag in self._BLOCKS or tag == "blockquote":
+            self._newline()
+        elif tag in ("ul", "ol"):
+            if self.lists:
+                self.lists.pop()
+            self._newline()
+        elif tag == "pre":
+            self._newline(1)
+            self.out.append("```")
+            self._newline()
+            self.pre = False
+        elif tag == "code" and not self.pre:
+            self.out.append("`")
+        elif tag in ("strong", "b"):
+            self.out.append("**")
+        elif tag in ("em", "i"):
+            self.out.append("*")
+        elif tag == "a" and self.href is not None:
+            self.out.append(f"]({self.href})")
+            self.href = None
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if not self.pre:
+            data = re.sub(r"\s+", " ", data)
+            if not self.out or self.out[-1].endswith(("\n", "> ", "- ", ". ", "# ")):
+                data = data.lstrip()
+        self.out.append(data)
+
+
+def html_to_markdown(html: str, base_url: str = "") -> str:
+    """Convert article HTML to markdown (headings, paragraphs, lists, links...)."""
+    converter = _MarkdownConverter(base_url)
+    converter.feed(html)
+    converter.close()
+    markdown = "".join(converter.out)
+    markdown = re.sub(r"[ \t]+\n", "\n", markdown)
+    markdown = re.sub(r"\*\*\s*\*\*|\[\]\([^)]*\)", "", markdown)
+    return re.sub(r"\n{3,}", "\n\n", markdown).strip()
+
+
+def quality_issues(article: ExtractedArticle, min_words: int = 150) -> List[str]:
+    """Reasons not to trust a local extraction; empty if it looks like an article."""
+    issues = []
+    words = article.content.split()
+    if not article.title.strip():
+        issues.append("no title")
+    if len(words) < min_words:
+        issues.append(f"only {len(words)} words")
+    lowered = article.content.lower()
+    blocked = [marker for marker in BLOCKED_MARKERS if marker in lowered]
+    # A long article may mention these in passing; a short one is likely the wall
+    if blocked and len(words) < 4 * min_words:
+        issues.append(f"looks blocked ({blocked[0]!r})")
+    # Plain paragraphs, not headings, list items or quotes
+    paragraphs = [
+        line
+        for line in article.content.splitlines()
+        if line.strip()
+        and not line.lstrip().startswith(("#", "-", "*", ">", "|"))
+        and not re.match(r"\s*\d+\. ", line)
+    ]
+    if paragraphs and sum(len(p.split()) for p in paragraphs) / len(paragraphs) < 8:
+        issues.append("mostly short lines (navigation or boilerplate)")
+    links = len(re.findall(r"\]\(", article.content))
+    if words and links / len(words) > 0.1:
+        issues.append("too many links")
+    return issues
+
+
+def _summary(meta_description: str, text: str, max_chars: int = 400) -> Optional[str]:
+    summary = meta_description.strip()
+    if not summary:
+        first_paragraph = next((p for p in text.split("\n") if p.strip()), "")
+        summary = first_paragraph.strip()
+    if len(summary) > max_chars:
+        summary = summary[:max_chars].rsplit(" ", 1)[0] + "…"
+    return summary or None
+
+
+def article_text(url: str, html: str) -> Optional[str]:
+    """
+    The article text newspaper4k finds in `html`, whitespace collapsed; None if there is
+    none. Unlike the page, it doesn't change with the ads or timestamps around it.
+    """
+    try:
+        page = NewspaperArticle(url)
+        page.download(input_html=html)
+        page.parse()
+    except Exception as e:
+        logger.debug(f"No article text for {url}: {e}")
+        return None
+    return " ".join(page.text.split()) or None
+
+
+def extract_article(
+    url: str,
+    html: Optional[str] = None,
+    min_words: int = 150,
+    timeout: float = 10.0,
+) -> Optional[ExtractedArticle]:
+    """
+    Extract the article at `url` (from `html` if it was already fetched, otherwise
+    downloading it within `timeout` seconds) without an LLM. Returns None if extraction
+    fails or the result doesn't pass `quality_issues`.
+    """
+    try:
+        page = NewspaperArticle(url, keep_article_html=True, request_timeout=timeout)
+        page.download(input_html=html)
+        page.parse()
+    except Exception as e:
+        logger.info(f"Local extraction failed for {url}: {e}")
+        return None
+    candidates = []
+    if page.article_html:
+        candidates.append(page.article_html)
+    if Document is not None and page.html:
+        try:
+            candidates.append(Document(page.html).summary(html_partial=True))
+        except Exception as e:
+            logger.debug(f"readability failed for {url}: {e}")
+    if page.text:
+        # Plain text paragraphs, in case neither gave usable HTML
+        candidates.append(
+            "".join(
+                f"<p>{html_lib.escape(paragraph)}</p>"
+                for paragraph in page.text.split("\n")
+                if paragraph.strip()
+            )
+        )
+    issues: List[str] = ["no article body found"]
+    for candidate in candidates:
+        article = ExtractedArticle(
+            title=page.title or "",
+            url=url,
+            summary=_summary(page.meta_description or "", page.text or ""),
+            content=html_to_markdown(candidate, url),
+        )
+        issues = quality_issues(article, min_words)
+        if not issues:
+            return article
+    logger.info(f"Local extraction of {url} rejected: {', '.join(issues)}")
+    return None
@@ -0,0 +1,479 @@
+"""Caches shared by the research workflow (09_research_workflow.py).
+
+`ResearchCache` keeps the workflow's per-topic reports, search results and the URLs of
+the articles scraped for each topic in normalized, indexed SQLite tables, so caching an
+item writes its own rows instead of re-serializing the workflow's whole session state.
+Topics are keyed by `canonical_topic`, so "Fusion energy developments" and
+"fusion-energy development" share entries, and `similar_topic` finds a past topic close
+enough for its search results to be reused ("fusion energy developments 2024"). Both
+keep word order: "Apple vs Microsoft" and "Microsoft vs Apple" share neither reports
+nor search results.
+
+`ArticleStore` keeps scraped articles keyed by URL, so an article scraped for one topic
+is reused by every other topic and session that finds the same page. Entries are:
+- fresh for `revalidate_after` seconds, and served without touching the network,
+- then revalidated with a conditional request (ETag / Last-Modified) and kept if the
+  page hasn't changed, or if its article text hasn't (compared by hash, so the ads and
+  timestamps around the article don't count as changes),
+- dropped after `ttl` seconds whatever the server says,
+- evicted least recently used first once there are more than `max_articles`.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from agno.utils.log import logger
+
+from article_extraction import article_text
+
+USER_AGENT = "Mozilla/5.0 (compatible; ResearchReportGenerator/1.0)"
+
+STOPWORDS = frozenset(
+    """
+    a about above after all an and any are as at be been before being between both but
+    by can could did do does during each for from had has have how if in into is it its
+    just me more most my now of on or our out over should so some such than that the
+    their them then there these they this those through to under up very was we were
+    what when where which while who why will with would you your
+    """.split()
+)
+
+# Not stopwords: "latest AI chips" asks for different results than "AI chips"
+RECENCY_WORDS = frozenset({"latest", "new", "newest", "recent", "current", "today"})
+
+
+def normalize_url(url: str) -> str:
+    """Cache key for a URL: lowercase scheme and host, no fragment or utm_ params."""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ]
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower(),
+            parts.path or "/",
+            urlencode(query),
+            "",
+        )
+    )
+
+
+def _stem(word: str) -> str:
+    """A light suffix-stripping stemmer: "developments", "developing" -> "develop"."""
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in ("ment", "ing", "ed"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+
+def _content_words(topic: str) -> List[str]:
+    words = re.findall(r"[a-z0-9]+", topic.lower())
+    return [_stem(word) for word in words if word not in STOPWORDS]
+
+
+def topic_tokens(topic: str) -> FrozenSet[str]:
+    """The stemmed content words of a topic, ignoring case, punctuation, stopwords."""
+    return frozenset(_content_words(topic))
+
+
+def canonical_topic(topic: str) -> str:
+    """
+    A cache key that is the same for trivially different phrasings of a topic. Word
+    order is kept: "US sanctions on China" and "China sanctions on US" are different.
+    """
+    words = _content_words(topic) or re.findall(r"[a-z0-9]+", topic.lower())
+    return "-".join(words)
+
+
+def _ordered_tokens(topic: str) -> List[str]:
+    # The topic's tokens in the order they first appear
+    return list(dict.fromkeys(_content_words(topic)))
+
+
+def topic_similarity(first: str, second: str) -> float:
+    """
+    How many of two topics' tokens appear in the same order in both (their longest
+    common subsequence), relative to their lengths, from 0 to 1. "fusion energy
+    developments" and "fusion energy developments 2024" score 0.86; "US sanctions on
+    China" and "China sanctions on US" only 0.33.
+    """
+    a, b = _ordered_tokens(first), _ordered_tokens(second)
+    if not a or not b:
+        return float(canonical_topic(first) == canonical_topic(second))
+    # lengths[j]: longest common subsequence of a[:i] and b[:j]
+    lengths = [0] * (len(b) + 1)
+    for token in a:
+        previous = 0
+        for j, other in enumerate(b, 1):
+            previous, lengths[j] = lengths[j], (
+                previous + 1 if token == other else max(lengths[j], lengths[j - 1])
+            )
+    return 2 * lengths[-1] / (len(a) + len(b))
+
+
+@dataclass
+class PageVersion:
+    """What identifies the version of a page we scraped."""
+
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+
+
+def _content_hash(url: str, html: str) -> str:
+    # The article text if there is one, the whole page otherwise
+    content = article_text(url, html) or html
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _get(
+    url: str, known: Optional[PageVersion], timeout: float
+) -> Tuple[bool, Optional[str], PageVersion]:
+    headers = {"User-Agent": USER_AGENT}
+    if known is not None and known.etag:
+        headers["If-None-Match"] = known.etag
+    if known is not None and known.last_modified:
+        headers["If-Modified-Since"] = known.last_modified
+    try:
+        with urllib.request.urlopen(
+            urllib.request.Request(url, headers=headers), timeout=timeout
+        ) as response:
+            # `timeout` bounds each socket read; this bounds the whole download
+            deadline = time.monotonic() + timeout
+            chunks = []
+            while chunk := response.read(64 * 1024):
+                chunks.append(chunk)
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"download took over {timeout:g}s")
+            charset = response.headers.get_content_charset() or "utf-8"
+            html = b"".join(chunks).decode(charset, errors="replace")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and known is not None:
+            return True, None, known
+        logger.warning(f"Could not fetch {url}: HTTP {e.code}")
+        return False, None, PageVersion()
+    except Exception as e:
+        logger.warning(f"Could not fetch {url}: {e}")
+        return False, None, PageVersion()
+    version = PageVersion(etag, last_modified, _content_hash(url, html))
+    unchanged = (
+        known is not None
+        and known.content_hash is not None
+        and known.content_hash == version.content_hash
+    )
+    return unchanged, html, version
+
+
+def check_page(
+    url: str, known: Optional[PageVersion] = None, timeout: float = 10.0
+) -> Tuple[bool, PageVersion]:
+    """
+    Fetch `url`, conditionally if `known` has validators. Returns whether the page is
+    unchanged since `known`, and its current version. Network errors count as changed.
+    """
+    unchanged, _, version = _get(url, known, timeout)
+    return unchanged, version
+
+
+def fetch_page(url: str, timeout: float = 10.0) -> Tuple[Optional[str], PageVersion]:
+    """The page's HTML (None if it couldn't be fetched) and its version."""
+    _, html, version = _get(url, None, timeout)
+    return html, version
+
+
+class ArticleStore:
+    """Scraped articles by URL, shared across topics and sessions."""
+
+    def __init__(
+        self,
+        db_file: str = "tmp/research_articles.db",
+        ttl: float = 7 * 24 * 60 * 60,
+        revalidate_after: float = 24 * 60 * 60,
+        max_articles: int = 5000,
+    ):
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        self.max_articles = max_articles
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                article TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                scraped_at REAL NOT NULL,
+                checked_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS articles_used_at ON articles (used_at)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """
+        The stored article for `url` if still current, revalidating it if due (giving up
+        on the server after `timeout` seconds).
+        """
+        key = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT article, etag, last_modified, content_hash, scraped_at,"
+                " checked_at FROM articles WHERE url = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        article, etag, last_modified, content_hash, scraped_at, checked_at = row
+        now = time.time()
+        if now - scraped_at > self.ttl:
+            self.delete(url)
+            return None
+        if now - checked_at > self.revalidate_after:
+            known = PageVersion(etag, last_modified, content_hash)
+            unchanged, _ = check_page(url, known, timeout)
+            if not unchanged:
+                logger.info(f"Article changed since it was scraped: {url}")
+                self.delete(url)
+                return None
+            checked_at = now
+        with self._lock:
+            self._conn.execute(
+                "UPDATE articles SET checked_at = ?, used_at = ? WHERE url = ?",
+                (checked_at, now, key),
+            )
+            self._conn.commit()
+        return json.loads(article)
+
+    def put(
+        self, url: str, article: Dict[str, Any], version: Optional[PageVersion] = None
+    ) -> None:
+        version = version or PageVersion()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO articles VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(url),
+                    json.dumps(article),
+                    version.etag,
+                    version.last_modified,
+                    version.content_hash,
+                    now,
+                    now,
+                    now,
+                ),
+            )
+            # Least recently used articles go first
+            self._conn.execute(
+                "DELETE FROM articles WHERE url IN (SELECT url FROM articles"
+                " ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_articles,),
+            )
+            self._conn.commit()
+
+    def delete(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM articles WHERE url = ?", (normalize_url(url),)
+            )
+            self._conn.commit()
+
+
+@lru_cache(maxsize=None)
+def get_article_store(db_file: str = "tmp/research_articles.db") -> ArticleStore:
+    """One store per database file, shared by every workflow in the process."""
+    return ArticleStore(db_file)
+
+
+class ResearchCache:
+    """Per-topic reports, search results and scraped article URLs."""
+
+    def __init__(self, db_file: str = "tmp/research_cache.db"):
+        Path(db_file).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                topic TEXT PRIMARY KEY,
+                report TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS search_results (
+                topic TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                summary TEXT,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (topic, position)
+            );
+            CREATE INDEX IF NOT EXISTS search_results_url ON search_results (url);
+            CREATE TABLE IF NOT EXISTS topic_articles (
+                topic TEXT NOT NULL,
+                url TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (topic, url)
+            );
+            CREATE INDEX IF NOT EXISTS topic_articles_url ON topic_articles (url);
+            CREATE TABLE IF NOT EXISTS topics (
+                topic TEXT PRIMARY KEY,
+                original TEXT NOT NULL,
+                num_tokens INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS topic_tokens (
+                token TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                PRIMARY KEY (token, topic)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _write(self, *statements: Tuple[str, Any]) -> None:
+        with self._lock:
+            with self._conn:
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._conn.executemany(sql, params)
+                    else:
+                        self._conn.execute(sql, params)
+
+    def get_report(self, topic: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT report FROM reports WHERE topic = ?", (canonical_topic(topic),)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put_report(self, topic: str, report: str) -> None:
+        self._write(
+            (
+                "INSERT OR REPLACE INTO reports VALUES (?, ?, ?)",
+                (canonical_topic(topic), report, time.time()),
+            )
+        )
+
+    def get_search_results(self, topic: str) -> Optional[List[Dict[str, Any]]]:
+        """The topic's search results as article dicts, in their original order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, url, summary FROM search_results WHERE topic = ?"
+                " ORDER BY position",
+                (canonical_topic(topic),),
+            ).fetchall()
+        if not rows:
+            return None
+        return [
+            {"title": title, "url": url, "summary": summary}
+            for title, url, summary in rows
+        ]
+
+    def put_search_results(self, topic: str, articles: List[Dict[str, Any]]) -> None:
+        key, tokens, now = canonical_topic(topic), topic_tokens(topic), time.time()
+        self._write(
+            ("DELETE FROM search_results WHERE topic = ?", (key,)),
+            (
+                "INSERT INTO search_results VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, i, a["url"], a["title"], a.get("summary"), now)
+                    for i, a in enumerate(articles)
+                ],
+            ),
+            # Index the topic so similar topics can find these results
+            (
+                "INSERT OR REPLACE INTO topics VALUES (?, ?, ?)",
+                (key, topic, len(tokens)),
+            ),
+            (
+                "INSERT OR IGNORE INTO topic_tokens VALUES (?, ?)",
+                [(token, key) for token in tokens],
+            ),
+        )
+
+    def similar_topic(
+        self, topic: str, min_similarity: float
+    ) -> Optional[Tuple[str, float]]:
+        """
+        The past topic with search results that is most similar to `topic`, and its
+        similarity, if that is at least `min_similarity`. Topics are compared by their
+        words in order (`topic_similarity`); topics asking for recent news ("latest",
+        "new"...) only get their own results.
+        """
+        tokens = topic_tokens(topic)
+        if not tokens or tokens & RECENCY_WORDS:
+            # Asking for the latest news; older results for another topic won't do
+            return None
+        placeholders = ", ".join("?" * len(tokens))
+        with self._lock:
+            # Only topics sharing at least one token can be similar
+            rows = self._conn.execute(
+                "SELECT topics.original, topics.num_tokens, COUNT(*) FROM topic_tokens"
+                " JOIN topics ON topics.topic = topic_tokens.topic"
+                f" WHERE topic_tokens.token IN ({placeholders})"
+                " GROUP BY topics.topic",
+                tuple(tokens),
+            ).fetchall()
+        best = None
+        for original, num_tokens, shared in rows:
+            # At most `shared` tokens can line up; skip topics that can't get close
+            if 2 * shared / (len(tokens) + num_tokens) < min_similarity:
+                continue
+            similarity = topic_similarity(topic, original)
+            if similarity >= min_similarity and (best is None or similarity > best[1]):
+                best = (original, similarity)
+        return best
+
+    def get_article_urls(self, topic: str) -> List[str]:
+        """URLs of the articles scraped for the topic, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM topic_articles WHERE topic = ? ORDER BY position",
+                (canonical_topic(topic),),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def put_article_urls(self, topic: str, urls: List[str]) -> None:
+        key = canonical_topic(topic)
+        self._write(
+            ("DELETE FROM topic_articles WHERE topic = ?", (key,)),
+            (
+                "INSERT OR IGNORE INTO topic_articles VALUES (?, ?, ?)",
+                [(key, url, i) for i, url in enumerate(urls)],
+            ),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_research_cache(db_file: str = "tmp/research_cache.db") -> ResearchCache:
+    """One cache per database file, shared by every workflow in the process."""
+    return ResearchCache(db_file)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TextIO
+
+from manager import FinancialResearchManager
+from printer import ScopedPrinter
+from result_cache import make_key
+
+
+@dataclass(frozen=True)
+class BatchQuery:
+    line: int
+    """1-based line number in the input; this is what resuming keys on."""
+
+    id: str
+    query: str
+
+
+def read_queries(source: TextIO) -> list[BatchQuery]:
+    """
+    Read JSONL queries. Each line is either an object with a `query` (and optional `id`) field
+    or a bare JSON string. Blank lines are skipped but still count towards line numbers.
+    """
+    queries: list[BatchQuery] = []
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if isinstance(record, str):
+            record = {"query": record}
+        queries.append(
+            BatchQuery(line_number, str(record.get("id", line_number)), record["query"])
+        )
+    return queries
+
+
+def completed_lines(output_path: Path) -> set[int]:
+    """Input line numbers that already have a successful result in `output_path`."""
+    if not output_path.exists():
+        return set()
+    done: set[int] = set()
+    with output_path.open() as output:
+        for line in output:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run.
+                continue
+            if "error" not in record:
+                done.add(record["line"])
+    return done
+
+
+async def run_batch(
+    manager: FinancialResearchManager,
+    queries: Iterable[BatchQuery],
+    output_path: Path,
+    concurrency: int = 4,
+) -> tuple[int, int]:
+    """
+    Research every query on one shared manager, at most `concurrency` at a time, appending each
+    result to `output_path` as soon as it completes. Queries whose line already has a result in
+    the output are skipped, so rerunning the same command resumes an interrupted batch. With a
+    checkpointing manager, a query that failed part way also resumes from its completed stages.
+
+    Returns `(succeeded, failed)`.
+    """
+    done = completed_lines(output_path)
+    pending = [query for query in queries if query.line not in done]
+    semaphore = asyncio.Semaphore(concurrency)
+    succeeded = failed = 0
+    printer = manager.printer
+
+    def report_progress() -> None:
+        printer.update_item(
+            "batch",
+            f"Batch: {succeeded + failed}/{len(pending)} done ({failed} failed, "
+            f"{len(done)} skipped as already complete)",
+            is_done=succeeded + failed == len(pending),
+        )
+
+    def run_id(query: BatchQuery) -> str | None:
+        # Stable per output file and line, so a rerun resumes the checkpoints of a query that
+        # failed part way instead of starting it over.
+        if manager.checkpoints is None:
+            return None
+        return "batch-" + make_key(str(output_path.resolve()), str(query.line), query.query)[:32]
+
+    with output_path.open("a") as output:
+
+        async def research(query: BatchQuery) -> None:
+            nonlocal succeeded, failed
+            async with semaphore:
+                scope = ScopedPrinter(printer, query.id)
+                record: dict[str, object] = {
+                    "line": query.line,
+                    "id": query.id,
+                    "query": query.query,
+                }
+                try:
+                    report, verification = await manager.research(
+                        query.query, printer=scope, run_id=run_id(query)
+                    )
+                    record["report"] = report.model_dump()
+                    record["verification"] = verification.model_dump()
+                    succeeded += 1
+                except Exception as e:
+                    record["error"] = repr(e)
+                    failed += 1
+                finally:
+                    scope.clear()
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                report_progress()
+
+        report_progress()
+        await asyncio.gather(*(research(query) for query in pending))
+    return succeeded, failed
@@ -0,0 +1,44 @@
+import time
+import timeit
+
+from agents import Agent
+
+from fin_agent.financials_agent import financials_agent
+from fin_agent.registry import _summary_extractor, default_agent_graph
+from fin_agent.risk_agent import risk_agent
+from fin_agent.writer_agent import writer_agent
+
+
+def rebuild_writer_tools() -> Agent:
+    """The work `_write_report` used to do for every request: two `as_tool` calls and a clone."""
+    fundamentals_tool = financials_agent.as_tool(
+        tool_name="fundamentals_analysis",
+        tool_description="Use to get a short write‑up of key financial metrics",
+        custom_output_extractor=_summary_extractor,
+    )
+    risk_tool = risk_agent.as_tool(
+        tool_name="risk_analysis",
+        tool_description="Use to get a short write‑up of potential red flags",
+        custom_output_extractor=_summary_extractor,
+    )
+    return writer_agent.clone(tools=[fundamentals_tool, risk_tool])
+
+
+# Measures the per-request cost of wiring up the writer's analyst tools.
+# Run from this directory: `python bench_agent_graph.py`
+# "before" rebuilds the tools and writer clone for every request, the way `_write_report` used
+# to; "after" looks up the graph built once at startup.
+def main(iterations: int = 2_000) -> None:
+    started = time.perf_counter()
+    default_agent_graph()
+    print(f"startup build:        {(time.perf_counter() - started) * 1e3:8.2f} ms (once)")
+
+    before = timeit.timeit(rebuild_writer_tools, number=iterations) / iterations
+    after = timeit.timeit(default_agent_graph, number=iterations) / iterations
+    print(f"per request (before): {before * 1e6:8.2f} µs")
+    print(f"per request (after):  {after * 1e6:8.2f} µs")
+    print(f"saved per request:    {(before - after) * 1e6:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Sequence
+from contextvars import ContextVar
+from typing import Any
+
+from agents import RunConfig, set_tracing_disabled
+
+from fake_model import FakeModelProvider, ModelCall, recorded_calls
+from fin_agent.planner_agent import FinancialSearchPlan
+from fin_agent.verifier_agent import VerificationResult
+from fin_agent.writer_agent import FinancialReportData
+from manager import FinancialResearchManager
+from printer import NullPrinter
+from scheduler import SearchScheduler
+
+# Measures orchestration overhead of FinancialResearchManager without any network access.
+# Every model call is served by `fake_model.FakeModelProvider`, which sleeps for a known latency,
+# so whatever wall time is left over is the pipeline's own cost.
+# Run from this directory: `python bench_pipeline.py --levels 1 10 100`
+# Add `--json` for machine-readable output, e.g. to compare against a baseline in CI.
+
+STAGES = ("plan", "search", "write", "verify")
+_stage_times: ContextVar[dict[str, float] | None] = ContextVar("stage_times", default=None)
+
+
+class TimedManager(FinancialResearchManager):
+    """Records the wall time of each stage of a run."""
+
+    def _record(self, stage: str, started: float) -> None:
+        times = _stage_times.get()
+        if times is not None:
+            times[stage] = time.monotonic() - started
+
+    async def _plan_searches(self, query: str) -> FinancialSearchPlan:
+        started = time.monotonic()
+        try:
+            return await super()._plan_searches(query)
+        finally:
+            self._record("plan", started)
+
+    async def _perform_searches(self, search_plan: FinancialSearchPlan) -> Sequence[str]:
+        started = time.monotonic()
+        try:
+            return await super()._perform_searches(search_plan)
+        finally:
+            self._record("search", started)
+
+    async def _write_report(self, *args: Any, **kwargs: Any) -> FinancialReportData:
+        started = time.monotonic()
+        try:
+            return await super()._write_report(*args, **kwargs)
+        finally:
+            self._record("write", started)
+
+    async def _verify_report(self, report: FinancialReportData) -> VerificationResult:
+        started = time.monotonic()
+        try:
+            return await super()._verify_report(report)
+        finally:
+            self._record("verify", started)
+
+
+def _model_time(stage: str, calls: list[ModelCall]) -> float:
+    """Simulated model time on the stage's critical path."""
+    kinds = {
+        "plan": "FinancialSearchPlan",
+        "search": "text",
+        "write": "FinancialReportData",
+        "verify": "VerificationResult",
+    }
+    latencies = [call.latency for call in calls if call.kind == kinds[stage]]
+    if not latencies:
+        return 0.0
+    # Searches run in parallel, so only the slowest one is on the critical path.
+    return max(latencies) if stage == "search" else sum(latencies)
+
+
+async def _one_run(manager: TimedManager, query: str) -> dict[str, Any]:
+    calls: list[ModelCall] = []
+    times: dict[str, float] = {}
+    recorded_calls.set(calls)
+    _stage_times.set(times)
+    started = time.monotonic()
+    await manager.research(query)
+    run: dict[str, Any] = {"e2e": time.monotonic() - started}
+    for stage in STAGES:
+        run[f"{stage}_overhead"] = times.get(stage, 0.0) - _model_time(stage, calls)
+    slowest_search = _model_time("search", calls)
+    run["fanout_efficiency"] = slowest_search / times["search"] if times.get("search") else 0.0
+    return run
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def bench(concurrency: int, num_searches: int, seed: int) -> dict[str, Any]:
+    provider = FakeModelProvider(num_searches=num_searches, seed=seed)
+    manager = TimedManager(
+        printer=NullPrinter(),
+        run_config=RunConfig(model_provider=provider),
+        # Don't let the search budget hide orchestration cost at high concurrency.
+        scheduler=SearchScheduler(max_concurrency=concurrency * num_searches),
+    )
+    started = time.monotonic()
+    runs = await asyncio.gather(
+        *(_one_run(manager, f"Analysis of company {i}") for i in range(concurrency))
+    )
+    e2e = [run["e2e"] for run in runs]
+    result: dict[str, Any] = {
+        "concurrency": concurrency,
+        "wall": time.monotonic() - started,
+        "e2e_p50": _percentile(e2e, 0.5),
+        "e2e_p95": _percentile(e2e, 0.95),
+        "fanout_efficiency": statistics.mean(run["fanout_efficiency"] for run in runs),
+    }
+    for stage in STAGES:
+        result[f"{stage}_overhead_ms"] = statistics.mean(
+            run[f"{stage}_overhead"] for run in runs
+        ) * 1e3
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the research pipeline")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--searches", type=int, default=8, help="searches per plan")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args()
+    set_tracing_disabled(True)
+    # Warm up: the first run pays one-off costs such as building the output schemas.
+    await bench(1, args.searches, args.seed)
+
+    if not args.json:
+        header = ["conc", "e2e p50", "e2e p95", "fan-out"]
+        header += [f"{stage} ovh" for stage in STAGES]
+        print(" ".join(f"{column:>10}" for column in header))
+    for level in args.levels:
+        result = await bench(level, args.searches, args.seed)
+        if args.json:
+            print(json.dumps(result))
+            continue
+        row = [
+            f"{level}",
+            f"{result['e2e_p50'] * 1e3:.1f}ms",
+            f"{result['e2e_p95'] * 1e3:.1f}ms",
+            f"{result['fanout_efficiency']:.2f}",
+        ]
+        row += [f"{result[f'{stage}_overhead_ms']:.2f}ms" for stage in STAGES]
+        print(" ".join(f"{column:>10}" for column in row))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
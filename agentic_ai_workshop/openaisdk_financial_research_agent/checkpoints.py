@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class RunInfo:
+    run_id: str
+    query: str
+    options: dict[str, Any]
+    """How the run was started, e.g. `{"mode": "compare", "companies": [...]}`."""
+
+    finished: bool
+    updated_at: float
+
+
+class CheckpointStore:
+    """
+    Records the output of each completed stage of a research run (the plan, every individual
+    search, the report...) in SQLite, keyed by run id, so a run that crashed can be resumed
+    without redoing the work it had already finished.
+
+    Values are stored as strings; the manager serializes stage outputs as JSON. Runs not
+    touched for `max_age_seconds` are deleted when the store is opened.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "tmp/financial_checkpoints.db",
+        max_age_seconds: float = 7 * 24 * 60 * 60,
+    ) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " options TEXT NOT NULL,"
+            " finished INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " run_id TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, key));"
+        )
+        self.prune(max_age_seconds)
+
+    def start(self, run_id: str, query: str, options: dict[str, Any]) -> None:
+        """Register a run, or mark an existing one (being resumed) as active again."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (run_id, query, options, updated_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (run_id) DO UPDATE SET finished = 0, updated_at = ?",
+                (run_id, query, json.dumps(options), time.time(), time.time()),
+            )
+            self._conn.commit()
+
+    def finish(self, run_id: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished = 1, updated_at = ? WHERE run_id = ?",
+                (time.time(), run_id),
+            )
+            self._conn.commit()
+
+    def run(self, run_id: str) -> RunInfo | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, query, options, finished, updated_at FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return RunInfo(row[0], row[1], json.loads(row[2]), bool(row[3]), row[4])
+
+    def unfinished_runs(self) -> list[RunInfo]:
+        """Runs that were started but never finished, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, query, options, finished, updated_at FROM runs"
+                " WHERE finished = 0 ORDER BY updated_at DESC"
+            ).fetchall()
+        return [RunInfo(row[0], row[1], json.loads(row[2]), bool(row[3]), row[4]) for row in rows]
+
+    def get(self, run_id: str, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM checkpoints WHERE run_id = ? AND key = ?", (run_id, key)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, run_id: str, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, key, value) VALUES (?, ?, ?)",
+                (run_id, key, value),
+            )
+            self._conn.execute(
+                "UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id)
+            )
+            self._conn.commit()
+
+    def prune(self, max_age_seconds: float) -> None:
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM checkpoints WHERE run_id IN"
+                " (SELECT run_id FROM runs WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
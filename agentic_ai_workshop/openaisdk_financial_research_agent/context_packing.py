@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import functools
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from streaming import split_blocks
+
+try:
+    import tiktoken
+except ImportError:  # Optional: fall back to a character-based estimate.
+    tiktoken = None
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9.%$-]*")
+_NUMBER = re.compile(r"\d")
+
+
+@functools.cache
+def _encoding(model: str):  # type: ignore[no-untyped-def]
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Token count with tiktoken when installed, otherwise the usual ~4 characters per token."""
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _terms(text: str) -> list[str]:
+    return [word.rstrip(".-") for word in _WORD.findall(text.casefold())]
+
+
+@dataclass(frozen=True)
+class Passage:
+    source: int
+    """1-based index of the search summary this passage came from."""
+
+    position: int
+    text: str
+    terms: frozenset[str]
+
+
+def _jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _unique_passages(summaries: Sequence[str], overlap: float) -> list[Passage]:
+    """
+    Split summaries into passages (a line, list item or whole table, so their markdown survives),
+    dropping any that mostly repeat one already kept.
+    """
+    kept: list[Passage] = []
+    for source, summary in enumerate(summaries, start=1):
+        for position, block in enumerate(split_blocks(summary)):
+            terms = frozenset(_terms(block))
+            if not terms or any(_jaccard(terms, other.terms) >= overlap for other in kept):
+                continue
+            kept.append(Passage(source, position, block, terms))
+    return kept
+
+
+def _rank(query: str, passages: Sequence[Passage]) -> list[tuple[float, Passage]]:
+    """
+    BM25 relevance to the query, plus small boosts for passages carrying figures and for
+    passages near the top of their summary (where the search agent puts the headline).
+    """
+    query_terms = set(_terms(query))
+    df = Counter(term for passage in passages for term in passage.terms)
+    avg_len = sum(len(passage.terms) for passage in passages) / max(1, len(passages))
+    k1, b = 1.2, 0.75
+    scored: list[tuple[float, Passage]] = []
+    for passage in passages:
+        length_norm = k1 * (1 - b + b * len(passage.terms) / max(1.0, avg_len))
+        score = 0.0
+        for term in query_terms & passage.terms:
+            idf = math.log(1 + (len(passages) - df[term] + 0.5) / (df[term] + 0.5))
+            score += idf * (k1 + 1) / (1 + length_norm)
+        if _NUMBER.search(passage.text):
+            score += 0.5
+        score += 0.3 / (1 + passage.position)
+        scored.append((score, passage))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored
+
+
+def pack_context(
+    query: str,
+    summaries: Sequence[str],
+    budget_tokens: int = 4000,
+    overlap: float = 0.7,
+    model: str = "gpt-4o",
+) -> str:
+    """
+    Pack search summaries into at most `budget_tokens` tokens for the writer prompt.
+
+    Lines, list items and tables repeated across summaries are kept once, the rest are ranked
+    by relevance to the query and added best-first until the budget is used, then printed back
+    in source order under a `[n]` line per search instead of a Python list repr.
+    """
+    passages = _unique_passages(summaries, overlap)
+    selected: list[Passage] = []
+    used = 0
+    for _, passage in _rank(query, passages):
+        # Each passage costs its own tokens plus a separating newline.
+        cost = count_tokens(passage.text, model) + 1
+        if used + cost > budget_tokens:
+            continue
+        selected.append(passage)
+        used += cost
+    selected.sort(key=lambda passage: (passage.source, passage.position))
+
+    lines: list[str] = []
+    for source in sorted({passage.source for passage in selected}):
+        text = "\n".join(passage.text for passage in selected if passage.source == source)
+        lines.append(f"[{source}]\n{text}")
+    return "\n\n".join(lines)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Sequence
+
+from fin_agent.planner_agent import FinancialSearchItem
+
+# Financial shorthand the planner uses interchangeably with the spelled-out form.
+_SYNONYMS = {
+    "q1": "first quarter",
+    "q2": "second quarter",
+    "q3": "third quarter",
+    "q4": "fourth quarter",
+    "fy": "fiscal year",
+    "yoy": "year over year",
+    "eps": "earnings per share",
+    "rev": "revenue",
+    "sales": "revenue",
+    "10k": "annual report",
+    "10-k": "annual report",
+    "10q": "quarterly report",
+    "10-q": "quarterly report",
+}
+_STOPWORDS = frozenset(
+    "a an and the of for in on to with from by about at its it is are latest recent most".split()
+)
+
+
+def _tokens(query: str) -> list[str]:
+    text = query.casefold().replace("’", "'")
+    words: list[str] = []
+    for word in re.findall(r"[\w-]+", text):
+        words.extend(_SYNONYMS.get(word, word).replace("-", " ").split())
+    # A crude plural strip is enough for query-length text ("margins" / "margin").
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in words
+        if word not in _STOPWORDS
+    ]
+
+
+def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
+    dot = sum(count * b[feature] for feature, count in a.items() if feature in b)
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class QueryIndex:
+    """
+    Small in-memory similarity index over search queries.
+
+    Queries are embedded locally as sparse vectors (after expanding common financial
+    abbreviations) and compared by cosine similarity, so no embedding API call is needed.
+    Words are weighted by inverse document frequency over `corpus` (normally the whole plan),
+    so a distinguishing word such as a different company name outweighs one every query shares.
+    Character trigrams add a smaller weight to tolerate inflection ("margin" / "margins").
+    """
+
+    def __init__(self, corpus: Sequence[str] = (), trigram_weight: float = 0.3) -> None:
+        self.trigram_weight = trigram_weight
+        self._df: Counter[str] = Counter()
+        for query in corpus:
+            self._df.update(set(_tokens(query)))
+        self._num_docs = len(corpus)
+        self._vectors: list[dict[str, float]] = []
+
+    def _vector(self, query: str) -> dict[str, float]:
+        vector: dict[str, float] = {}
+        for token in _tokens(query):
+            idf = math.log(1 + (self._num_docs + 1) / (self._df[token] + 1))
+            vector[f"w:{token}"] = vector.get(f"w:{token}", 0.0) + idf
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                key = f"c:{padded[i:i + 3]}"
+                vector[key] = vector.get(key, 0.0) + self.trigram_weight
+        return vector
+
+    def add(self, query: str) -> int:
+        self._vectors.append(self._vector(query))
+        return len(self._vectors) - 1
+
+    def most_similar(self, query: str) -> tuple[int, float] | None:
+        vector = self._vector(query)
+        best: tuple[int, float] | None = None
+        for index, other in enumerate(self._vectors):
+            score = _cosine(vector, other)
+            if best is None or score > best[1]:
+                best = (index, score)
+        return best
+
+
+def dedupe_search_items(
+    items: Sequence[FinancialSearchItem], threshold: float = 0.8
+) -> tuple[list[FinancialSearchItem], list[list[FinancialSearchItem]]]:
+    """
+    Greedily cluster near-paraphrase queries. Each item joins the most similar earlier cluster
+    if that similarity is at least `threshold`, otherwise it starts a new one. The first item of
+    each cluster (its position in the plan) is the representative that actually gets searched.
+
+    Returns `(representatives, clusters)`.
+    """
+    index = QueryIndex([item.query for item in items])
+    clusters: list[list[FinancialSearchItem]] = []
+    for item in items:
+        match = index.most_similar(item.query)
+        if match is not None and match[1] >= threshold:
+            clusters[match[0]].append(item)
+        else:
+            index.add(item.query)
+            clusters.append([item])
+    return [cluster[0] for cluster in clusters], clusters
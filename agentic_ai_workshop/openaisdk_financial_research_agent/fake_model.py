@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from collections.abc import AsyncIterator, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+from agents import Model, ModelProvider, ModelResponse, Usage
+
+from fin_agent.comparison_agent import ComparisonEntities
+from fin_agent.financials_agent import AnalysisSummary
+from fin_agent.planner_agent import FinancialSearchItem, FinancialSearchPlan
+from fin_agent.reviser_agent import ReportRevision, RevisedSection
+from fin_agent.verifier_agent import VerificationResult
+from fin_agent.writer_agent import FinancialReportData
+
+
+@dataclass(frozen=True)
+class LatencyDistribution:
+    """Log-normal latency with the given median; `sigma` controls how heavy the tail is."""
+
+    median: float
+    sigma: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.sigma <= 0:
+            return self.median
+        return self.median * math.exp(rng.gauss(0.0, self.sigma))
+
+
+# Keyed on the output type name, or "text" for the plain-text search agent.
+DEFAULT_LATENCIES = {
+    "FinancialSearchPlan": LatencyDistribution(0.05),
+    "text": LatencyDistribution(0.10, sigma=0.5),
+    "AnalysisSummary": LatencyDistribution(0.05),
+    "FinancialReportData": LatencyDistribution(0.20),
+    "ReportRevision": LatencyDistribution(0.08),
+    "VerificationResult": LatencyDistribution(0.05),
+    "ComparisonEntities": LatencyDistribution(0.03),
+}
+
+_SEARCH_TOPICS = [
+    "latest quarterly revenue",
+    "gross margin trend",
+    "forward guidance",
+    "earnings call highlights",
+    "analyst rating changes",
+    "competitive landscape",
+    "regulatory risks",
+    "free cash flow",
+    "share buybacks and dividends",
+    "industry demand outlook",
+]
+
+
+@dataclass(frozen=True)
+class ModelCall:
+    kind: str
+    """Output type name, or "text"."""
+
+    latency: float
+    started: float
+
+
+# The benchmark sets a fresh list per research run to attribute simulated model time to it.
+recorded_calls: ContextVar[list[ModelCall] | None] = ContextVar("recorded_calls", default=None)
+
+
+def _text_of(input: Any) -> str:
+    if isinstance(input, str):
+        return input
+    # A list of input items: use the text of the messages.
+    contents = [item.get("content") for item in input if isinstance(item, dict)]
+    text = "\n".join(content for content in contents if isinstance(content, str))
+    return text or json.dumps(input, default=str)
+
+
+def _subject(text: str) -> str:
+    first_line = text.splitlines()[0] if text else ""
+    return first_line.split(":", 1)[-1].strip()[:80] or "the company"
+
+
+def _plan(text: str, num_searches: int) -> FinancialSearchPlan:
+    subject = _subject(text)
+    # Comparative mode plans once per company, naming it on a "Focus on:" line.
+    focus = re.search(r"^Focus on: (.+)$", text, re.MULTILINE)
+    searches = [
+        FinancialSearchItem(
+            reason=f"Background on {topic}",
+            query=f"{focus.group(1) if focus else subject} {topic}",
+        )
+        for topic in _SEARCH_TOPICS[:num_searches]
+    ]
+    if focus:
+        searches.append(
+            FinancialSearchItem(reason="Industry background", query="sector demand trends")
+        )
+    return FinancialSearchPlan(searches=searches)
+
+
+def _entities(text: str) -> ComparisonEntities:
+    names = re.findall(r"\b[A-Z][\w&.-]*", text)
+    return ComparisonEntities(companies=[name for name in names if name != "Compare"])
+
+
+def _report(text: str) -> FinancialReportData:
+    subject = _subject(text)
+    sections = "\n\n".join(
+        f"### {title}\n\n" + " ".join(f"{title} detail {i} for {subject}." for i in range(40))
+        for title in ("Executive Summary", "Financial Performance", "Risks", "Outlook")
+    )
+    return FinancialReportData(
+        short_summary=f"{subject} delivered a steady quarter.",
+        markdown_report=f"## Report on {subject}\n\n{sections}\n",
+        follow_up_questions=[f"What is next for {subject}?", "How durable are the margins?"],
+    )
+
+
+def _revision(text: str) -> ReportRevision:
+    subject = _subject(text)
+    return ReportRevision(
+        sections=[
+            RevisedSection(
+                heading="### Outlook",
+                markdown=f"### Outlook\n\nUpdated outlook for {subject} after new results.\n",
+            )
+        ],
+        short_summary=f"{subject} delivered a steady quarter; the outlook was updated.",
+        follow_up_questions=[f"What is next for {subject}?"],
+    )
+
+
+FIXTURES: dict[str, Callable[[str, int], Any]] = {
+    "FinancialSearchPlan": _plan,
+    "AnalysisSummary": lambda text, _: AnalysisSummary(summary=f"Analysis of {_subject(text)}."),
+    "FinancialReportData": lambda text, _: _report(text),
+    "ComparisonEntities": lambda text, _: _entities(text),
+    "ReportRevision": lambda text, _: _revision(text),
+    "VerificationResult": lambda text, _: VerificationResult(verified=True, issues=""),
+}
+# The fixer agent's `<Type>Fix` outputs (fin_agent/fixer_agent.py) hold a subset of <Type>'s
+# fields; the model answers with just the fields the schema asks for.
+FIXTURES.update({f"{kind}Fix": build for kind, build in list(FIXTURES.items())})
+
+
+class FakeModel(Model):
+    """
+    A deterministic stand-in for a real model. It never calls tools; it sleeps for a sampled
+    latency and returns a schema-valid instance of the agent's output type (or a short search
+    summary for plain-text agents). Outputs depend only on the input, so runs are reproducible.
+    """
+
+    def __init__(self, provider: FakeModelProvider, model_name: str | None) -> None:
+        self.provider = provider
+        self.model_name = model_name or "fake"
+
+    def _output(self, input: Any, output_schema: Any) -> tuple[str, str]:
+        text = _text_of(input)
+        if output_schema is None or output_schema.is_plain_text():
+            kind = "text"
+        else:
+            kind = output_schema.name()
+        if kind == "text":
+            digest = hashlib.sha256(text.encode()).hexdigest()[:8]
+            subject = _subject(text)
+            return kind, (
+                f"{subject}: revenue rose 4% to $12.{digest[0]} billion. "
+                f"Management reiterated guidance (ref {digest}). Margins held steady."
+            )
+        build = FIXTURES.get(kind)
+        if build is None:
+            raise ValueError(f"FakeModel has no fixture for output type {kind!r}")
+        fields = set(output_schema.json_schema().get("properties", {}))
+        return kind, build(text, self.provider.num_searches).model_dump_json(include=fields)
+
+    async def _simulate(self, kind: str) -> float:
+        distribution = self.provider.latencies.get(kind, LatencyDistribution(0.0))
+        latency = distribution.sample(self.provider.rng)
+        started = time.monotonic()
+        calls = recorded_calls.get()
+        if calls is not None:
+            calls.append(ModelCall(kind, latency, started))
+        await asyncio.sleep(latency)
+        return latency
+
+    @staticmethod
+    def _message(text: str) -> ResponseOutputMessage:
+        return ResponseOutputMessage(
+            id="msg_fake",
+            content=[ResponseOutputText(text=text, type="output_text", annotations=[])],
+            role="assistant",
+            status="completed",
+            type="message",
+        )
+
+    @staticmethod
+    def _usage(input: Any, output: str) -> Usage:
+        input_tokens = len(_text_of(input)) // 4
+        output_tokens = len(output) // 4
+        return Usage(
+            requests=1,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=input_tokens + output_tokens,
+        )
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ) -> ModelResponse:
+        kind, output = self._output(input, output_schema)
+        await self._simulate(kind)
+        return ModelResponse(
+            output=[self._message(output)], usage=self._usage(input, output), response_id=None
+        )
+
+    async def stream_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ) -> AsyncIterator[Any]:
+        kind, output = self._output(input, output_schema)
+        await self._simulate(kind)
+        size = self.provider.chunk_chars
+        chunks = [output[i : i + size] for i in range(0, len(output), size)]
+        for sequence, chunk in enumerate(chunks):
+            yield ResponseTextDeltaEvent.model_construct(
+                type="response.output_text.delta",
+                item_id="msg_fake",
+                output_index=0,
+                content_index=0,
+                delta=chunk,
+                logprobs=[],
+                sequence_number=sequence,
+            )
+        usage = self._usage(input, output)
+        response = Response.model_construct(
+            id="resp_fake",
+            created_at=time.time(),
+            model=self.model_name,
+            object="response",
+            output=[self._message(output)],
+            parallel_tool_calls=False,
+            tool_choice="auto",
+            tools=[],
+            usage=ResponseUsage.model_construct(
+                input_tokens=usage.input_tokens,
+                input_tokens_details=InputTokensDetails.model_construct(cached_tokens=0),
+                output_tokens=usage.output_tokens,
+                output_tokens_details=OutputTokensDetails.model_construct(reasoning_tokens=0),
+                total_tokens=usage.total_tokens,
+            ),
+        )
+        yield ResponseCompletedEvent.model_construct(
+            type="response.completed", response=response, sequence_number=len(chunks)
+        )
+
+
+class FakeModelProvider(ModelProvider):
+    """
+    Serves `FakeModel`s for every model name, so the whole pipeline runs offline:
+    `FinancialResearchManager(run_config=RunConfig(model_provider=FakeModelProvider()))`.
+    """
+
+    def __init__(
+        self,
+        latencies: dict[str, LatencyDistribution] | None = None,
+        num_searches: int = 8,
+        seed: int = 0,
+        chunk_chars: int = 256,
+    ) -> None:
+        self.latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+        self.num_searches = num_searches
+        self.rng = random.Random(seed)
+        # Characters per streamed text delta.
+        self.chunk_chars = chunk_chars
+
+    def get_model(self, model_name: str | None) -> Model:
+        return FakeModel(self, model_name)
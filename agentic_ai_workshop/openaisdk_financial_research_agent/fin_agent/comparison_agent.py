@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+
+from agents import Agent
+
+from fin_agent.writer_agent import FinancialReportData
+
+# Agents for comparative queries such as "compare Nike, Adidas and Puma last quarter".
+# The manager splits the query per company, researches each one (sharing any searches the
+# companies have in common) and then writes a single comparison from the per-company analyses.
+ENTITY_PROMPT = (
+    "You identify the companies a financial research request is about. Return each company "
+    "once, by its common name, in the order the request mentions them."
+)
+
+
+class ComparisonEntities(BaseModel):
+    companies: list[str]
+    """The companies to compare."""
+
+
+entity_agent = Agent(
+    name="ComparisonEntityAgent",
+    instructions=ENTITY_PROMPT,
+    model="gpt-4o-mini",
+    output_type=ComparisonEntities,
+)
+
+COMPARISON_PROMPT = (
+    "You are a senior financial analyst. You will be provided with a comparative research "
+    "request, a fundamentals and a risk write-up for each company, and search summaries that "
+    "apply to all of them. Write a long‑form markdown report that compares the companies "
+    "side by side (include a comparison table of the key metrics where the data allows), with "
+    "a short executive summary and follow‑up questions. Use only the material provided."
+)
+
+comparison_writer_agent = Agent(
+    name="ComparisonWriterAgent",
+    instructions=COMPARISON_PROMPT,
+    model="gpt-4.5-preview-2025-02-27",
+    output_type=FinancialReportData,
+)
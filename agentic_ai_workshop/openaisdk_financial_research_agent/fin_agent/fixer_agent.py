@@ -0,0 +1,30 @@
+import functools
+from typing import Any
+
+from pydantic import BaseModel, create_model
+
+from agents import Agent
+
+# Fixer agent fills in the few fields of a structured output that could not be repaired locally
+# (see output_repair.py), so a malformed report costs one small call instead of a full rewrite.
+FIXER_PROMPT = (
+    "You complete partially generated JSON objects. You will be given the fields that were "
+    "produced and the names of the fields that are missing or invalid. Return only those "
+    "fields, consistent with the rest of the object. Do not invent facts that the existing "
+    "fields do not support."
+)
+
+
+@functools.cache
+def fixer_agent(output_type: type[BaseModel], fields: tuple[str, ...]) -> Agent:
+    """An agent whose output has just `fields` of `output_type`, built once per combination."""
+    field_definitions: dict[str, Any] = {
+        name: (output_type.model_fields[name].annotation, ...) for name in fields
+    }
+    fix_type = create_model(f"{output_type.__name__}Fix", **field_definitions)
+    return Agent(
+        name=f"{output_type.__name__}FixerAgent",
+        instructions=FIXER_PROMPT,
+        model="gpt-4o-mini",
+        output_type=fix_type,
+    )
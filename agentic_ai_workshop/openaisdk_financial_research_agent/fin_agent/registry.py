@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from agents import Agent, FunctionTool, RunResult, Tool, default_tool_error_function
+
+from fin_agent.comparison_agent import comparison_writer_agent, entity_agent
+from fin_agent.financials_agent import financials_agent
+from fin_agent.planner_agent import planner_agent
+from fin_agent.reviser_agent import reviser_agent
+from fin_agent.risk_agent import risk_agent
+from fin_agent.search_agent import search_agent
+from fin_agent.verifier_agent import verifier_agent
+from fin_agent.writer_agent import writer_agent
+from output_repair import RepairingOutputSchema
+
+
+async def _summary_extractor(run_result: RunResult) -> str:
+    """Custom output extractor for sub‑agents that return an AnalysisSummary."""
+    # The financial/risk analyst agents emit an AnalysisSummary with a `summary` field.
+    # We want the tool call to return just that summary text so the writer can drop it inline.
+    return str(run_result.final_output.summary)
+
+
+def _repairing(agent: Agent) -> Agent:
+    """`agent` with its structured output repaired locally when it fails validation."""
+    return agent.clone(output_type=RepairingOutputSchema(agent.output_type))
+
+
+@dataclass(frozen=True)
+class AgentGraph:
+    """
+    The fully wired set of agents one research run needs. Build it once and share it: runs only
+    read from it, so concurrent runs can use the same instance safely.
+    """
+
+    planner: Agent
+    search: Agent
+    writer: Agent
+    """The writer with the analyst tools already attached."""
+
+    verifier: Agent
+    reviser: Agent
+    """Updates a stored report when a query is researched again."""
+
+    financials: Agent
+    risk: Agent
+    """The analysts, for running them directly (comparative mode) rather than as tools."""
+
+    entities: Agent
+    comparison_writer: Agent
+
+    analyst_tools: tuple[Tool, ...]
+
+
+def build_agent_graph(
+    wrap_tool: Callable[[FunctionTool, Agent], FunctionTool] | None = None,
+) -> AgentGraph:
+    """
+    Wire up the agents. `wrap_tool(tool, agent)` is applied to each analyst tool, e.g. to
+    memoize its calls.
+    """
+    # Expose the specialist analysts as tools so the writer can invoke them inline
+    # and still produce the final FinancialReportData output.
+    # A wrapper sees failures as exceptions, so it can tell them from results (the tool memo
+    # reports them to the model itself, without memoizing them).
+    on_failure = None if wrap_tool is not None else default_tool_error_function
+    fundamentals_tool = financials_agent.as_tool(
+        tool_name="fundamentals_analysis",
+        tool_description="Use to get a short write‑up of key financial metrics",
+        custom_output_extractor=_summary_extractor,
+        failure_error_function=on_failure,
+    )
+    risk_tool = risk_agent.as_tool(
+        tool_name="risk_analysis",
+        tool_description="Use to get a short write‑up of potential red flags",
+        custom_output_extractor=_summary_extractor,
+        failure_error_function=on_failure,
+    )
+    if wrap_tool is not None:
+        fundamentals_tool = wrap_tool(fundamentals_tool, financials_agent)
+        risk_tool = wrap_tool(risk_tool, risk_agent)
+    analyst_tools = (fundamentals_tool, risk_tool)
+    return AgentGraph(
+        planner=_repairing(planner_agent),
+        search=search_agent,
+        writer=_repairing(writer_agent).clone(tools=list(analyst_tools)),
+        verifier=_repairing(verifier_agent),
+        reviser=_repairing(reviser_agent),
+        financials=_repairing(financials_agent),
+        risk=_repairing(risk_agent),
+        entities=_repairing(entity_agent),
+        comparison_writer=_repairing(comparison_writer_agent),
+        analyst_tools=analyst_tools,
+    )
+
+
+@functools.cache
+def default_agent_graph() -> AgentGraph:
+    """The process-wide graph, built on first use."""
+    return build_agent_graph()
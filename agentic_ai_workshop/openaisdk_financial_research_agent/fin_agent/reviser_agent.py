@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+
+from agents import Agent
+
+# Reviser agent updates an existing report in place when a query is researched again.
+# It only rewrites the sections that the refreshed search results actually change, which keeps
+# the output (and so the cost and latency) of a daily rerun small.
+REVISER_PROMPT = (
+    "You are a senior financial analyst updating a report you wrote earlier. You will be given "
+    "the original query, the current markdown report and a set of refreshed search summaries. "
+    "Rewrite only the sections whose facts, figures or conclusions are changed by the refreshed "
+    "results, keeping each section's heading exactly as it appears in the report. Add a new "
+    "section only if the results cover something the report does not. Do not return sections "
+    "that need no change. Also return an updated executive summary and follow-up questions."
+)
+
+
+class RevisedSection(BaseModel):
+    heading: str
+    """The section's markdown heading line, e.g. `### Outlook`, exactly as in the report."""
+
+    markdown: str
+    """The full revised section, starting with its heading."""
+
+
+class ReportRevision(BaseModel):
+    sections: list[RevisedSection]
+    """Only the sections that changed, or are new."""
+
+    short_summary: str
+    """An updated 2‑3 sentence executive summary."""
+
+    follow_up_questions: list[str]
+    """Suggested follow‑up questions for further research."""
+
+
+reviser_agent = Agent(
+    name="FinancialReviserAgent",
+    instructions=REVISER_PROMPT,
+    model="gpt-4.5-preview-2025-02-27",
+    output_type=ReportRevision,
+)
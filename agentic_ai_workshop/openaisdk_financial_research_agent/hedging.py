@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SearchDeadlines:
+    """
+    Tail-latency controls for the search phase.
+
+    `per_search_seconds` bounds a single search (including any hedge), `phase_budget_seconds`
+    bounds the whole fan-out. With `hedge` enabled, a search that is still running after the
+    observed `hedge_quantile` latency gets a duplicate request, and whichever finishes first wins.
+    Until enough latencies have been observed, `initial_hedge_delay` is used instead.
+    """
+
+    per_search_seconds: float | None = 60.0
+    phase_budget_seconds: float | None = 120.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    initial_hedge_delay: float = 20.0
+
+
+@dataclass
+class SearchPhaseStats:
+    """Counters for one search phase, shown to the user through the `Printer`."""
+
+    hedges_launched: int = 0
+    hedge_wins: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"Hedged {self.hedges_launched} slow searches ({self.hedge_wins} won), "
+            f"{self.timeouts} timed out, {self.cancelled} cancelled at the phase budget"
+        )
+
+    def __bool__(self) -> bool:
+        return any((self.hedges_launched, self.timeouts, self.cancelled))
+
+
+class LatencyTracker:
+    """Keeps a sliding window of recent latencies and answers quantile queries over it."""
+
+    def __init__(self, window: int = 200, min_samples: int = 10) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float | None:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def hedged(
+    attempt: Callable[[], Awaitable[T]],
+    delay: float | None,
+    on_hedge: Callable[[], None] | None = None,
+    hedge_attempt: Callable[[], Awaitable[T]] | None = None,
+) -> tuple[T, bool]:
+    """
+    Run `attempt()`; if it hasn't finished after `delay` seconds, start a second copy (calling
+    `on_hedge`) and return the first successful result. Returns `(result, hedge_won)`. The losing
+    attempt is cancelled. If every attempt fails, the last error is raised.
+
+    `hedge_attempt`, if given, is run as the second copy instead of `attempt`, e.g. to have it
+    wait for a scheduler slot of its own while `attempt` runs in one it already holds.
+    """
+    primary = asyncio.ensure_future(attempt())
+    tasks = {primary}
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                if on_hedge is not None:
+                    on_hedge()
+                tasks.add(asyncio.ensure_future((hedge_attempt or attempt)()))
+        error: BaseException | None = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is not primary
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,6 +1,21 @@
+import argparse
 import asyncio
+import logging
+import sys
+from pathlib import Path
 
+from batch import read_queries, run_batch
+from checkpoints import CheckpointStore
+from hedging import SearchDeadlines
 from manager import FinancialResearchManager
+from metrics import MetricsRegistry
+from printer import make_printer
+from report_store import ReportStore
+from report_stream import report_emitters
+from result_cache import ResultCache
+from routing import ModelRouter, RoutingPolicy
+from streaming import StreamingConfig
+from tool_memo import ToolMemo
 
 
 # Entrypoint for the financial bot example.
@@ -8,11 +23,146 @@ from manager import FinancialResearchManager
 # financial research query, for example:
 # "Write up an analysis of Apple Inc.'s most recent quarter."
 # "Write up an analysis of Nike most recent quarter."
+# Pass `--compare` for queries such as "Compare Nike, Adidas and Puma last quarter".
+# Pass `--stream` to start writing once most searches are back instead of waiting for all of them.
+# `--stream-report -` prints the report as it is written (or pass a file, a directory for one file
+# per run in batch mode, or tcp://host:port).
+#
+# For many queries, pass a JSONL file (or `-` for stdin) with one query per line:
+# `python main.py --batch tickers.jsonl --output reports.jsonl --concurrency 8`
+# Rerunning the same command resumes after the lines already in the output file.
+# To serve research over HTTP as a job API instead, see server.py.
+# `--metrics metrics.prom --run-summaries runs.jsonl` exports per-stage latency, queueing, token,
+# retry and cache-hit metrics (Prometheus text format) and a JSON summary of each run.
+# `--context-budget 4000` packs the search results given to the writer into about 4000 tokens,
+# keeping the lines most relevant to the query; by default they are passed in whole.
+# `--route` lets writer and verifier calls with small inputs use a faster model tier; `--slo 90`
+# also falls back to faster tiers when a stage's observed latency would overrun a 90 second
+# budget for the whole run.
+# With `--incremental`, rerunning a query only re-searches results older than `--fresh-hours`
+# and revises the affected sections of the report stored by the previous run.
+# `--checkpoint` records every completed stage and search; after a crash, `--resume` (optionally
+# with the printed run id) finishes the most recent unfinished run without redoing that work.
 async def main() -> None:
-    query = input("Enter a financial research query: ")
-    mgr = FinancialResearchManager()
-    await mgr.run(query)
+    parser = argparse.ArgumentParser(description="Financial research agent")
+    parser.add_argument(
+        "--stream", action="store_true", help="write the report from a quorum of searches"
+    )
+    parser.add_argument(
+        "--stream-report",
+        metavar="TARGET",
+        help="stream the report markdown as it is written: -, a path, or tcp://host:port",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="treat the query as a comparison of several companies",
+    )
+    parser.add_argument(
+        "--hedge", action="store_true", help="duplicate searches that run past the p95 latency"
+    )
+    parser.add_argument(
+        "--verify-sections",
+        action="store_true",
+        help="verify report sections in parallel while the writer is still streaming",
+    )
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=None,
+        help="pack search results into this many tokens for the writer prompt (off by default)",
+    )
+    parser.add_argument("--batch", help="JSONL file of queries to research, or - for stdin")
+    parser.add_argument(
+        "--output", default="reports.jsonl", help="where batch results are appended"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="queries researched at once in batch mode"
+    )
+    parser.add_argument(
+        "--progress",
+        choices=["rich", "log", "json", "none"],
+        help="how to report progress (default: rich on a terminal, log otherwise)",
+    )
+    parser.add_argument(
+        "--route", action="store_true", help="pick a model tier per call from the input size"
+    )
+    parser.add_argument(
+        "--slo", type=float, help="latency target in seconds per query (implies --route)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="update the stored report of a repeat query instead of starting over",
+    )
+    parser.add_argument(
+        "--fresh-hours", type=float, default=20, help="how long a stored search result is reused"
+    )
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="checkpoint each completed stage so a crashed run can be resumed",
+    )
+    parser.add_argument(
+        "--resume",
+        nargs="?",
+        const="",
+        metavar="RUN_ID",
+        help="resume a checkpointed run (default: the most recent unfinished one)",
+    )
+    parser.add_argument("--metrics", help="write Prometheus text metrics here on exit")
+    parser.add_argument("--run-summaries", help="append a JSON metrics summary per run here")
+    args = parser.parse_args()
+    progress = args.progress or ("rich" if sys.stdout.isatty() else "log")
+    if progress == "log":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    mgr = FinancialResearchManager(
+        printer=make_printer(progress),
+        search_cache=ResultCache(),
+        # Analyst write-ups go stale faster than raw search results.
+        tool_memo=ToolMemo(ResultCache("tmp/analyst_tool_memo.db", ttl_seconds=60 * 60)),
+        streaming=StreamingConfig() if args.stream else None,
+        deadlines=SearchDeadlines(hedge=args.hedge),
+        section_verification=args.verify_sections,
+        context_budget=args.context_budget or None,
+        router=(
+            ModelRouter(RoutingPolicy(slo_seconds=args.slo))
+            if args.route or args.slo is not None
+            else None
+        ),
+        report_store=(
+            ReportStore(freshness_seconds=args.fresh_hours * 60 * 60) if args.incremental else None
+        ),
+        report_stream=report_emitters(args.stream_report) if args.stream_report else None,
+        checkpoints=(
+            CheckpointStore() if args.checkpoint or args.resume is not None else None
+        ),
+        metrics=MetricsRegistry(
+            summary_path=Path(args.run_summaries) if args.run_summaries else None
+        ),
+    )
+    try:
+        if args.batch:
+            if args.batch == "-":
+                queries = read_queries(sys.stdin)
+            else:
+                with open(args.batch) as source:
+                    queries = read_queries(source)
+            await run_batch(mgr, queries, Path(args.output), args.concurrency)
+            mgr.printer.end()
+            return
+
+        if args.resume is not None:
+            await mgr.run_resumed(args.resume or None)
+            return
+
+        query = input("Enter a financial research query: ")
+        await mgr.run(query, comparative=args.compare)
+    finally:
+        if args.metrics:
+            Path(args.metrics).write_text(mgr.metrics.to_prometheus())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
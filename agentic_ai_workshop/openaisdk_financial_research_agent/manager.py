@@ -1,27 +1,82 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import re
 import time
-from collections.abc import Sequence
+from collections.abc import Awaitable, Callable, Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar
 
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import TypeAdapter
 from rich.console import Console
 
-from agents import Runner, RunResult, custom_span, gen_trace_id, trace
+from agents import (
+    Agent,
+    ModelBehaviorError,
+    RunConfig,
+    Runner,
+    custom_span,
+    gen_trace_id,
+    trace,
+)
 
-from fin_agent.financials_agent import financials_agent
-from fin_agent.planner_agent import FinancialSearchItem, FinancialSearchPlan, planner_agent
-from fin_agent.risk_agent import risk_agent
-from fin_agent.search_agent import search_agent
-from fin_agent.verifier_agent import VerificationResult, verifier_agent
-from fin_agent.writer_agent import FinancialReportData, writer_agent
-from printer import Printer
+from fin_agent.comparison_agent import ComparisonEntities
+from fin_agent.financials_agent import AnalysisSummary
+from fin_agent.fixer_agent import fixer_agent
+from fin_agent.planner_agent import FinancialSearchItem, FinancialSearchPlan
+from fin_agent.registry import AgentGraph, build_agent_graph, default_agent_graph
+from fin_agent.reviser_agent import ReportRevision
+from fin_agent.verifier_agent import VerificationResult
+from fin_agent.writer_agent import FinancialReportData
+from checkpoints import CheckpointStore
+from context_packing import pack_context
+from dedup import QueryIndex, dedupe_search_items
+from hedging import LatencyTracker, SearchDeadlines, SearchPhaseStats, hedged
+from metrics import MetricsRegistry, StageRecord
+from output_repair import PartialOutput
+from printer import Printer, ProgressSink, ScopedPrinter
+from report_store import ReportStore, StoredResearch, StoredSearch, apply_revision
+from report_stream import MarkdownEmitter
+from result_cache import ResultCache, make_key, normalize_query
+from routing import ModelRouter
+from scheduler import SearchScheduler
+from section_verify import (
+    JsonStringFieldExtractor,
+    MarkdownSectionSplitter,
+    merge_verifications,
+)
+from streaming import PreSynthesizer, StreamingConfig
+from tool_memo import ToolMemo
 
 
-async def _summary_extractor(run_result: RunResult) -> str:
-    """Custom output extractor for sub‑agents that return an AnalysisSummary."""
-    # The financial/risk analyst agents emit an AnalysisSummary with a `summary` field.
-    # We want the tool call to return just that summary text so the writer can drop it inline.
-    return str(run_result.final_output.summary)
+# Lets concurrent `research()` calls on one manager each report to their own (scoped) printer.
+_current_printer: ContextVar[ProgressSink | None] = ContextVar(
+    "current_printer", default=None
+)
+# Id of the run in progress (its trace id unless given), used to group stage metrics per run and
+# to key its checkpoints.
+_current_run_id: ContextVar[str | None] = ContextVar("current_run_id", default=None)
+# Monotonic time by which the run in progress should finish, when routing with a latency SLO.
+_current_deadline: ContextVar[float | None] = ContextVar("current_deadline", default=None)
+# Successful searches of the run in progress, by planned query, for the report store.
+_current_searches: ContextVar[dict[str, StoredSearch] | None] = ContextVar(
+    "current_searches", default=None
+)
+
+T = TypeVar("T")
+
+# Serializes stage outputs (models, or plain search result strings) for the checkpoint store.
+_adapter = functools.cache(TypeAdapter)
+
+
+def _model_name(agent: Agent) -> str | None:
+    """The model an agent will run on, as a string key (None means the SDK default)."""
+    if agent.model is None or isinstance(agent.model, str):
+        return agent.model
+    return getattr(agent.model, "model", None)
 
 
 class FinancialResearchManager:
@@ -29,12 +84,288 @@ class FinancialResearchManager:
     Orchestrates the full flow: planning, searching, sub‑analysis, writing, and verification.
     """
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        scheduler: SearchScheduler | None = None,
+        search_cache: ResultCache | None = None,
+        streaming: StreamingConfig | None = None,
+        deadlines: SearchDeadlines | None = None,
+        dedup_threshold: float | None = 0.8,
+        printer: ProgressSink | None = None,
+        section_verification: bool = False,
+        agents: AgentGraph | None = None,
+        tool_memo: ToolMemo | None = None,
+        context_budget: int | None = None,
+        run_config: RunConfig | None = None,
+        metrics: MetricsRegistry | None = None,
+        router: ModelRouter | None = None,
+        report_store: ReportStore | None = None,
+        checkpoints: CheckpointStore | None = None,
+        report_stream: Callable[[str], MarkdownEmitter] | None = None,
+    ) -> None:
         self.console = Console()
-        self.printer = Printer(self.console)
+        # Prebuilt once and shared by every run (see fin_agent/registry.py). With a tool memo,
+        # the writer's analyst tools reuse earlier answers to the same question.
+        self.tool_memo = tool_memo
+        if agents is None:
+            agents = build_agent_graph(tool_memo.wrap) if tool_memo else default_agent_graph()
+        self.agents = agents
+        # Defaults to the rich live display; pass a LogPrinter, JsonPrinter or NullPrinter
+        # when there is no terminal.
+        self._printer = printer or Printer(self.console)
+        # Pass the same scheduler to several managers to make them share one search budget.
+        self.scheduler = scheduler or SearchScheduler()
+        self.search_cache = search_cache
+        # When set, the writer starts on a quorum of searches instead of waiting for all of them.
+        self.streaming = streaming
+        self.deadlines = deadlines or SearchDeadlines()
+        # Similarity above which two planned queries count as paraphrases; None disables dedup.
+        self.dedup_threshold = dedup_threshold
+        # Applied to every agent run, e.g. to swap in `fake_model.FakeModelProvider` offline.
+        self.run_config = run_config
+        # Token budget for the search results in the writer prompt; None passes them through as-is.
+        self.context_budget = context_budget
+        # Verify the report section by section while the writer is still streaming it.
+        self.section_verification = section_verification
+        # Observed search latencies, shared across runs, used to pick the hedging delay.
+        self.search_latency = LatencyTracker()
+        # Per-stage latency, queueing, token, retry and cache-hit metrics across all runs.
+        self.metrics = metrics or MetricsRegistry()
+        # Moves the planner, writer and verifier to faster models for small inputs or when the
+        # latency SLO is at risk; None keeps every agent on its pinned model.
+        self.router = router
+        # When set, a repeat query reuses fresh search results from its last run and has the
+        # reviser update only the affected sections of the stored report.
+        self.report_store = report_store
+        # When set, each completed stage and search is checkpointed so `resume` can pick up a
+        # crashed run where it stopped.
+        self.checkpoints = checkpoints
+        # Called with the run id to get an emitter (see `report_stream.report_emitters`) that
+        # receives the report's markdown while the writer is still generating it.
+        self.report_stream = report_stream
+        # The last report streamed to stdout, so `_print_result` doesn't print it a second time.
+        self._streamed_to_stdout: str | None = None
+
+    @property
+    def printer(self) -> ProgressSink:
+        return _current_printer.get() or self._printer
+
+    @contextmanager
+    def _stage(self, stage: str) -> Iterator[StageRecord]:
+        with self.metrics.stage(stage, _current_run_id.get()) as record:
+            yield record
+        if self.router is not None and record.model is not None:
+            self.router.record(stage, record.model, record.wall_seconds)
+
+    def _route(self, stage: str, agent: Agent, input_data: str, record: StageRecord) -> Agent:
+        """
+        The agent to run `record`'s stage with. `stage` names the share of the latency SLO it
+        may use; the router's latency histograms are keyed on `record.stage`.
+        """
+        if self.router is None:
+            return agent
+        budget = None
+        deadline = _current_deadline.get()
+        if deadline is not None:
+            budget = self.router.policy.stage_budget(stage, deadline - time.monotonic())
+        routed = self.router.route(record.stage, agent, input_data, budget)
+        record.model = _model_name(routed)
+        return routed
+
+    async def run(self, query: str, comparative: bool = False) -> None:
+        if comparative:
+            report, verification = await self.compare(query)
+        else:
+            report, verification = await self.research(query)
+        self._print_result(report, verification)
+
+    async def run_resumed(self, run_id: str | None = None) -> None:
+        report, verification = await self.resume(run_id)
+        self._print_result(report, verification)
+
+    def _print_result(self, report: FinancialReportData, verification: VerificationResult) -> None:
+        self.printer.end()
+
+        # Print to stdout
+        print("\n\n=====REPORT=====\n\n")
+        if report.markdown_report == self._streamed_to_stdout:
+            print("Report: streamed above as it was written.")
+        else:
+            print(f"Report:\n{report.markdown_report}")
+        print("\n\n=====FOLLOW UP QUESTIONS=====\n\n")
+        print("\n".join(report.follow_up_questions))
+        print("\n\n=====VERIFICATION=====\n\n")
+        print(verification)
+
+    async def research(
+        self, query: str, printer: ProgressSink | None = None, run_id: str | None = None
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        """
+        Run the full flow for one query and return the report and its verification. Safe to call
+        concurrently on one manager; pass a `ScopedPrinter` to keep each run's progress
+        separate. With checkpoints, passing the `run_id` of an earlier run of the same query
+        reuses whatever that run completed.
+        """
+        token = _current_printer.set(printer)
+        try:
+            return await self._research(
+                query, self._research_single, {"mode": "single"}, run_id
+            )
+        finally:
+            _current_printer.reset(token)
+
+    async def compare(
+        self,
+        query: str,
+        companies: Sequence[str] | None = None,
+        printer: ProgressSink | None = None,
+        run_id: str | None = None,
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        """
+        Comparative research, e.g. "compare Nike, Adidas and Puma last quarter". Each company
+        gets its own plan and analyst write-ups, searches the companies share are run once,
+        and a single comparative report is written. `companies` defaults to those the query
+        names.
+        """
+        token = _current_printer.set(printer)
+        try:
+            return await self._research(
+                query,
+                lambda query: self._research_comparison(query, companies),
+                {"mode": "compare", "companies": list(companies) if companies else None},
+                run_id,
+            )
+        finally:
+            _current_printer.reset(token)
+
+    async def resume(
+        self, run_id: str | None = None, printer: ProgressSink | None = None
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        """
+        Finish a checkpointed run that crashed or was interrupted, skipping every stage and
+        individual search it had already completed. Defaults to the most recent unfinished run.
+        """
+        if self.checkpoints is None:
+            raise ValueError("Resuming a run requires a checkpoint store")
+        if run_id is None:
+            unfinished = self.checkpoints.unfinished_runs()
+            if not unfinished:
+                raise ValueError("There is no unfinished run to resume")
+            info = unfinished[0]
+        else:
+            info = self.checkpoints.run(run_id)
+            if info is None:
+                raise ValueError(f"No checkpointed run {run_id!r}")
+        if info.options.get("mode") == "compare":
+            return await self.compare(
+                info.query, info.options.get("companies"), printer, info.run_id
+            )
+        return await self.research(info.query, printer, info.run_id)
+
+    async def _checkpointed(
+        self, key: str, output_type: type[T], compute: Callable[[], Awaitable[T]]
+    ) -> T:
+        """The output of `key`'s stage from the run's checkpoint, else computed and saved."""
+        run_id = _current_run_id.get()
+        if self.checkpoints is None or run_id is None:
+            return await compute()
+        stored = self.checkpoints.get(run_id, key)
+        if stored is not None:
+            self.printer.update_item(
+                f"checkpoint:{key}", f"Reused {key} from the checkpoint", is_done=True
+            )
+            return _adapter(output_type).validate_json(stored)
+        output = await compute()
+        self._save_checkpoint(key, output_type, output)
+        return output
+
+    def _has_checkpoint(self, key: str) -> bool:
+        run_id = _current_run_id.get()
+        return (
+            self.checkpoints is not None
+            and run_id is not None
+            and self.checkpoints.get(run_id, key) is not None
+        )
+
+    def _save_checkpoint(self, key: str, output_type: type[T], output: T) -> None:
+        run_id = _current_run_id.get()
+        if self.checkpoints is not None and run_id is not None:
+            self.checkpoints.put(run_id, key, _adapter(output_type).dump_json(output).decode())
+
+    async def _run_structured(
+        self, agent: Agent, input_data: str, output_type: type[T], record: StageRecord
+    ) -> T:
+        """
+        Run `agent` for a structured output. Malformed output is repaired locally by the
+        agent's output schema; only output that can't be repaired at all re-runs the stage.
+        """
+        try:
+            result = await Runner.run(agent, input_data, run_config=self.run_config)
+        except ModelBehaviorError:
+            record.retries += 1
+            result = await Runner.run(agent, input_data, run_config=self.run_config)
+        record.add_usage(result)
+        return await self._complete_output(result.final_output, output_type, record)
 
-    async def run(self, query: str) -> None:
+    async def _complete_output(
+        self, output: object, output_type: type[T], record: StageRecord
+    ) -> T:
+        """Fill in the fields a local repair couldn't recover with one small, targeted call."""
+        if isinstance(output, PartialOutput):
+            self.printer.update_item(
+                "repair",
+                f"Completing {', '.join(output.missing)} of {output.output_type.__name__}",
+            )
+            fixer = fixer_agent(output.output_type, output.missing)
+            result = await Runner.run(fixer, output.fix_prompt(), run_config=self.run_config)
+            record.add_usage(result)
+            record.model_fixes += 1
+            output = output.complete(result.final_output)
+            self.printer.remove_items("repair")
+        if not isinstance(output, output_type):
+            raise ModelBehaviorError(
+                f"Expected {output_type.__name__}, got {type(output).__name__}"
+            )
+        return output
+
+    async def _research(
+        self,
+        query: str,
+        flow: Callable[[str], Awaitable[tuple[FinancialReportData, VerificationResult]]],
+        options: dict[str, Any],
+        run_id: str | None = None,
+    ) -> tuple[FinancialReportData, VerificationResult]:
         trace_id = gen_trace_id()
+        # A resumed run keeps its id (and checkpoints) but gets a trace of its own.
+        run_id = run_id or trace_id
+        run_token = _current_run_id.set(run_id)
+        searches_token = _current_searches.set({})
+        slo = self.router.policy.slo_seconds if self.router is not None else None
+        deadline_token = _current_deadline.set(
+            time.monotonic() + slo if slo is not None else None
+        )
+        if self.checkpoints is not None:
+            self.checkpoints.start(run_id, query, options)
+            self.printer.update_item(
+                "run_id", f"Checkpointing as run {run_id}", is_done=True, hide_checkmark=True
+            )
+        try:
+            result = await self._traced_research(query, trace_id, flow)
+        finally:
+            _current_deadline.reset(deadline_token)
+            _current_searches.reset(searches_token)
+            _current_run_id.reset(run_token)
+            self.metrics.finish_run(run_id)
+        if self.checkpoints is not None:
+            self.checkpoints.finish(run_id)
+        return result
+
+    async def _traced_research(
+        self,
+        query: str,
+        trace_id: str,
+        flow: Callable[[str], Awaitable[tuple[FinancialReportData, VerificationResult]]],
+    ) -> tuple[FinancialReportData, VerificationResult]:
         with trace("Financial research trace", trace_id=trace_id):
             self.printer.update_item(
                 "trace_id",
@@ -43,76 +374,478 @@ class FinancialResearchManager:
                 hide_checkmark=True,
             )
             self.printer.update_item("start", "Starting financial research...", is_done=True)
-            search_plan = await self._plan_searches(query)
-            search_results = await self._perform_searches(search_plan)
-            report = await self._write_report(query, search_results)
-            verification = await self._verify_report(report)
+            report, verification = await flow(query)
 
             final_report = f"Report summary\n\n{report.short_summary}"
             self.printer.update_item("final_report", final_report, is_done=True)
+        return report, verification
 
-            self.printer.end()
+    async def _research_single(
+        self, query: str
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        search_plan = await self._checkpointed(
+            "plan", FinancialSearchPlan, lambda: self._plan_searches(query)
+        )
+        search_plan = self._dedupe_searches(search_plan)
+        previous = self.report_store.load(query) if self.report_store is not None else None
+        if previous is not None:
+            report, verification = await self._refresh_report(query, search_plan, previous)
+        else:
+            if self.streaming is not None:
+                search_results = await self._stream_searches(search_plan, self.streaming)
+            else:
+                search_results = await self._perform_searches(search_plan)
+            if self.section_verification and not self._has_checkpoint("report"):
+                report, verification = await self._write_and_verify_sections(
+                    query, search_results
+                )
+                self._save_checkpoint("report", FinancialReportData, report)
+                self._save_checkpoint("verification", VerificationResult, verification)
+            else:
+                report = await self._checkpointed(
+                    "report",
+                    FinancialReportData,
+                    lambda: self._write_report(query, search_results),
+                )
+                verification = await self._checkpointed(
+                    "verification", VerificationResult, lambda: self._verify_report(report)
+                )
+        if self.report_store is not None:
+            self.report_store.save(
+                query, search_plan, _current_searches.get() or {}, report, verification
+            )
+        return report, verification
 
-        # Print to stdout
-        print("\n\n=====REPORT=====\n\n")
-        print(f"Report:\n{report.markdown_report}")
-        print("\n\n=====FOLLOW UP QUESTIONS=====\n\n")
-        print("\n".join(report.follow_up_questions))
-        print("\n\n=====VERIFICATION=====\n\n")
-        print(verification)
+    async def _research_comparison(
+        self, query: str, companies: Sequence[str] | None
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        if not companies:
+
+            async def identify() -> ComparisonEntities:
+                with self._stage("entities") as record:
+                    entities = await self._run_structured(
+                        self.agents.entities, query, ComparisonEntities, record
+                    )
+                if not entities.companies:
+                    # Raised before the checkpoint is saved, so a resume asks the model again.
+                    raise ValueError(f"Found no companies to compare in {query!r}")
+                return entities
+
+            entities = await self._checkpointed("entities", ComparisonEntities, identify)
+            companies = entities.companies
+        self.printer.update_item("companies", f"Comparing {', '.join(companies)}", is_done=True)
+
+        async def plan(company: str) -> FinancialSearchPlan:
+            _current_printer.set(ScopedPrinter(self.printer, company))
+            return await self._checkpointed(
+                f"plan:{company}",
+                FinancialSearchPlan,
+                lambda: self._plan_searches(f"{query}\nFocus on: {company}"),
+            )
+
+        plans = await asyncio.gather(*(plan(company) for company in companies))
+
+        # One pool of searches for every company, deduplicated across all the plans. A search
+        # that names companies (on word boundaries) belongs to each company it names, wherever
+        # it was planned, and is only deduplicated against searches naming the same companies;
+        # the rest (industry background, say) belong to every company that planned them. Each
+        # pooled search runs once and its result goes to its owners, or to the shared results
+        # if it belongs to every company.
+        threshold = self.dedup_threshold if self.dedup_threshold is not None else 1.0
+        patterns = {
+            company: re.compile(rf"(?<!\w){re.escape(company)}(?!\w)", re.IGNORECASE)
+            for company in companies
+        }
+        items: list[FinancialSearchItem] = []
+        planned_by: dict[int, str] = {}
+        by_named: dict[frozenset[str], list[FinancialSearchItem]] = {}
+        for company, company_plan in zip(companies, plans):
+            for item in company_plan.searches:
+                items.append(item)
+                planned_by[id(item)] = company
+                named = frozenset(
+                    name for name, pattern in patterns.items() if pattern.search(item.query)
+                )
+                by_named.setdefault(named, []).append(item)
+        pool: list[tuple[FinancialSearchItem, set[str]]] = []
+        for named, group in by_named.items():
+            representatives, clusters = dedupe_search_items(group, threshold)
+            for item, cluster in zip(representatives, clusters):
+                pool.append((item, set(named) or {planned_by[id(member)] for member in cluster}))
+        num_planned = len(items)
+        self.printer.update_item(
+            "search_pool",
+            f"Pooled {num_planned} planned searches into {len(pool)} "
+            f"({sum(len(owners) > 1 for _, owners in pool)} shared)",
+            is_done=True,
+        )
+        await self._perform_searches(FinancialSearchPlan(searches=[item for item, _ in pool]))
+        searches = _current_searches.get() or {}
+        shared: list[str] = []
+        per_company: dict[str, list[str]] = {company: [] for company in companies}
+        for item, owners in pool:
+            search = searches.get(item.query)
+            if search is None:
+                continue
+            if len(owners) == len(companies) > 1:
+                shared.append(search.result)
+            else:
+                for company in owners:
+                    per_company[company].append(search.result)
+
+        analyses = await self._analyse_companies(query, per_company, shared)
+        report = await self._checkpointed(
+            "report",
+            FinancialReportData,
+            lambda: self._write_comparison(query, analyses, shared),
+        )
+        verification = await self._checkpointed(
+            "verification", VerificationResult, lambda: self._verify_report(report)
+        )
+        return report, verification
+
+    def _search_context(self, query: str, search_results: Sequence[str]) -> str:
+        if self.context_budget is not None:
+            return pack_context(query, search_results, self.context_budget)
+        return "\n".join(search_results)
+
+    async def _analyse_companies(
+        self, query: str, per_company: dict[str, list[str]], shared: Sequence[str]
+    ) -> dict[str, tuple[str, str]]:
+        """Run the fundamentals and risk analysts for every company at once."""
+        total = 2 * len(per_company)
+        num_done = 0
+        self.printer.update_item("analysis", f"Analysing... 0/{total} done")
+
+        async def analyse(company: str, analyst: Agent) -> str:
+            nonlocal num_done
+            results = self._search_context(query, [*per_company[company], *shared])
+            input_data = f"Company: {company}\nRequest: {query}\nSearch results:\n{results}"
+
+            async def run() -> AnalysisSummary:
+                with self._stage("analysis") as record:
+                    return await self._run_structured(
+                        analyst, input_data, AnalysisSummary, record
+                    )
+
+            summary = await self._checkpointed(
+                f"analysis:{company}:{analyst.name}", AnalysisSummary, run
+            )
+            num_done += 1
+            self.printer.update_item("analysis", f"Analysing... {num_done}/{total} done")
+            return summary.summary
+
+        companies = list(per_company)
+        write_ups = await asyncio.gather(
+            *(
+                analyse(company, analyst)
+                for company in companies
+                for analyst in (self.agents.financials, self.agents.risk)
+            )
+        )
+        self.printer.mark_item_done("analysis")
+        return {
+            company: (write_ups[2 * i], write_ups[2 * i + 1])
+            for i, company in enumerate(companies)
+        }
+
+    async def _write_comparison(
+        self, query: str, analyses: dict[str, tuple[str, str]], shared: Sequence[str]
+    ) -> FinancialReportData:
+        self.printer.update_item("writing", "Writing the comparison...")
+        sections = [
+            f"## {company}\nFundamentals: {fundamentals}\nRisks: {risks}"
+            for company, (fundamentals, risks) in analyses.items()
+        ]
+        input_data = (
+            f"Comparative request: {query}\nCompanies: {', '.join(analyses)}\n\n"
+            + "\n\n".join(sections)
+            + f"\n\nShared search results:\n{self._search_context(query, shared)}"
+        )
+        with self._stage("write") as record:
+            writer = self._route("write", self.agents.comparison_writer, input_data, record)
+            report = await self._run_structured(writer, input_data, FinancialReportData, record)
+        self.printer.mark_item_done("writing")
+        return report
+
+    def _stale_searches(
+        self, search_plan: FinancialSearchPlan, previous: StoredResearch
+    ) -> list[FinancialSearchItem]:
+        """
+        Diff the new plan against the stored run: reuse the stored result of any planned search
+        that matches a fresh one from last time and return the searches that must run again.
+        """
+        assert self.report_store is not None
+        stored = list(previous.searches.values())
+        corpus = [search.query for search in stored] + [item.query for item in search_plan.searches]
+        index = QueryIndex(corpus)
+        for search in stored:
+            index.add(search.query)
+        threshold = self.dedup_threshold if self.dedup_threshold is not None else 1.0
+        reused = _current_searches.get()
+        stale: list[FinancialSearchItem] = []
+        for item in search_plan.searches:
+            match = index.most_similar(item.query)
+            if match is not None and match[1] >= threshold:
+                search = stored[match[0]]
+                if self.report_store.is_fresh(search):
+                    if reused is not None:
+                        reused[item.query] = search
+                    continue
+            stale.append(item)
+        return stale
+
+    async def _refresh_report(
+        self, query: str, search_plan: FinancialSearchPlan, previous: StoredResearch
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        """Update the stored report of a repeat query instead of writing it from scratch."""
+        stale = self._stale_searches(search_plan, previous)
+        self.printer.update_item(
+            "refresh",
+            f"Reusing {len(search_plan.searches) - len(stale)} fresh results from the last run, "
+            f"refreshing {len(stale)}",
+            is_done=True,
+        )
+        if not stale:
+            return previous.report, previous.verification
+        search_results = await self._perform_searches(FinancialSearchPlan(searches=stale))
+        if not search_results:
+            return previous.report, previous.verification
+        report = await self._revise_report(query, previous.report, search_results)
+        return report, await self._verify_report(report)
+
+    async def _revise_report(
+        self, query: str, report: FinancialReportData, search_results: Sequence[str]
+    ) -> FinancialReportData:
+        self.printer.update_item("writing", "Revising the sections affected by new results...")
+        results = self._search_context(query, search_results)
+        input_data = (
+            f"Original query: {query}\n\nCurrent report:\n{report.markdown_report}\n\n"
+            f"Refreshed search results:\n{results}"
+        )
+        with self._stage("revise") as record:
+            reviser = self._route("write", self.agents.reviser, input_data, record)
+            revision = await self._run_structured(reviser, input_data, ReportRevision, record)
+        self.printer.update_item(
+            "writing", f"Revised {len(revision.sections)} sections", is_done=True
+        )
+        return FinancialReportData(
+            short_summary=revision.short_summary,
+            markdown_report=apply_revision(report.markdown_report, revision.sections),
+            follow_up_questions=revision.follow_up_questions,
+        )
 
     async def _plan_searches(self, query: str) -> FinancialSearchPlan:
         self.printer.update_item("planning", "Planning searches...")
-        result = await Runner.run(planner_agent, f"Query: {query}")
+        input_data = f"Query: {query}"
+        with self._stage("plan") as record:
+            planner = self._route("plan", self.agents.planner, input_data, record)
+            plan = await self._run_structured(planner, input_data, FinancialSearchPlan, record)
         self.printer.update_item(
             "planning",
-            f"Will perform {len(result.final_output.searches)} searches",
+            f"Will perform {len(plan.searches)} searches",
             is_done=True,
         )
-        return result.final_output_as(FinancialSearchPlan)
+        return plan
+
+    def _dedupe_searches(self, search_plan: FinancialSearchPlan) -> FinancialSearchPlan:
+        if self.dedup_threshold is None:
+            return search_plan
+        representatives, _ = dedupe_search_items(search_plan.searches, self.dedup_threshold)
+        if len(representatives) < len(search_plan.searches):
+            self.printer.update_item(
+                "dedup",
+                f"Merged {len(search_plan.searches)} planned searches into "
+                f"{len(representatives)} distinct ones",
+                is_done=True,
+            )
+        return FinancialSearchPlan(searches=representatives)
 
     async def _perform_searches(self, search_plan: FinancialSearchPlan) -> Sequence[str]:
         with custom_span("Search the web"):
             self.printer.update_item("searching", "Searching...")
-            tasks = [asyncio.create_task(self._search(item)) for item in search_plan.searches]
+            stats = SearchPhaseStats()
+            tasks = [
+                asyncio.create_task(self._search(item, priority=position, stats=stats))
+                for position, item in enumerate(search_plan.searches)
+            ]
             results: list[str] = []
             num_completed = 0
-            for task in asyncio.as_completed(tasks):
-                result = await task
-                if result is not None:
-                    results.append(result)
-                num_completed += 1
+            try:
+                for task in asyncio.as_completed(
+                    tasks, timeout=self.deadlines.phase_budget_seconds
+                ):
+                    result = await task
+                    if result is not None:
+                        results.append(result)
+                    num_completed += 1
+                    self.printer.update_item(
+                        "searching", f"Searching... {num_completed}/{len(tasks)} completed"
+                    )
+            except asyncio.TimeoutError:
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+                        stats.cancelled += 1
+                self._report_search_tail(stats)
+            if self.search_cache is not None:
+                cache_stats = self.search_cache.stats
                 self.printer.update_item(
-                    "searching", f"Searching... {num_completed}/{len(tasks)} completed"
+                    "search_cache",
+                    f"Search cache: {cache_stats.hits} hits, {cache_stats.misses} misses",
+                    is_done=True,
                 )
             self.printer.mark_item_done("searching")
             return results
 
-    async def _search(self, item: FinancialSearchItem) -> str | None:
+    async def _stream_searches(
+        self, search_plan: FinancialSearchPlan, config: StreamingConfig
+    ) -> Sequence[str]:
+        with custom_span("Search the web (streaming)"):
+            self.printer.update_item("searching", "Searching...")
+            queue: asyncio.Queue[str | None] = asyncio.Queue()
+            stats = SearchPhaseStats()
+
+            async def produce(position: int, item: FinancialSearchItem) -> None:
+                queue.put_nowait(await self._search(item, priority=position, stats=stats))
+
+            tasks = [
+                asyncio.create_task(produce(position, item))
+                for position, item in enumerate(search_plan.searches)
+            ]
+            quorum = config.quorum_count(len(tasks))
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + config.deadline_seconds
+            synthesizer = PreSynthesizer()
+            num_completed = num_succeeded = 0
+            try:
+                while num_completed < len(tasks) and num_succeeded < quorum:
+                    try:
+                        result = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                    num_completed += 1
+                    if result is not None:
+                        num_succeeded += 1
+                        synthesizer.add(result)
+                    self.printer.update_item(
+                        "searching",
+                        f"Searching... {num_completed}/{len(tasks)} completed "
+                        f"(writing after {quorum})",
+                    )
+            finally:
+                # Whatever is still running would arrive after the writer has started.
+                for task in tasks:
+                    task.cancel()
+            self.printer.update_item(
+                "searching",
+                f"Writing from {num_succeeded}/{len(tasks)} searches "
+                f"({len(tasks) - num_completed} skipped)",
+                is_done=True,
+            )
+            return synthesizer.condensed()
+
+    def _report_search_tail(self, stats: SearchPhaseStats) -> None:
+        self.printer.update_item("search_tail", stats.describe(), is_done=True)
+
+    async def _search(
+        self, item: FinancialSearchItem, priority: int = 0, stats: SearchPhaseStats | None = None
+    ) -> str | None:
         input_data = f"Search term: {item.query}\nReason: {item.reason}"
-        try:
-            result = await Runner.run(search_agent, input_data)
+        cache_key = make_key(
+            normalize_query(item.query),
+            str(self.agents.search.instructions),
+            _model_name(self.agents.search),
+        )
+        # A resumed run reuses every search it completed before it stopped.
+        run_id = _current_run_id.get()
+        checkpoint_key = f"search:{normalize_query(item.query)}"
+        output = None
+        if self.checkpoints is not None and run_id is not None:
+            output = self.checkpoints.get(run_id, checkpoint_key)
+        if output is None:
+            with self._stage("search") as record:
+                output = await self._run_search(input_data, cache_key, priority, stats, record)
+            if output is not None and self.checkpoints is not None and run_id is not None:
+                self.checkpoints.put(run_id, checkpoint_key, output)
+        searches = _current_searches.get()
+        if output is not None and searches is not None:
+            searches[item.query] = StoredSearch(item.query, output, time.time())
+        return output
+
+    async def _run_search(
+        self,
+        input_data: str,
+        cache_key: str,
+        priority: int,
+        stats: SearchPhaseStats | None,
+        record: StageRecord,
+    ) -> str | None:
+        if self.search_cache is not None:
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                record.cache_hit = True
+                return cached
+        stats = stats if stats is not None else SearchPhaseStats()
+
+        model = _model_name(self.agents.search)
+
+        async def attempt() -> str:
+            # Called with a scheduler slot held, so only the time the search ran is recorded.
+            started = time.monotonic()
+            result = await Runner.run(self.agents.search, input_data, run_config=self.run_config)
+            record.add_usage(result)
+            self.search_latency.record(time.monotonic() - started)
             return str(result.final_output)
+
+        async def hedge_attempt() -> str:
+            async with self.scheduler.slot(priority, model=model):
+                return await attempt()
+
+        def on_hedge() -> None:
+            stats.hedges_launched += 1
+            record.retries += 1
+            self._report_search_tail(stats)
+
+        hedge_delay = None
+        if self.deadlines.hedge:
+            hedge_delay = self.search_latency.quantile(self.deadlines.hedge_quantile)
+            if hedge_delay is None:
+                hedge_delay = self.deadlines.initial_hedge_delay
+        try:
+            # The deadline and the hedge timer start once the search has a slot, so time spent
+            # queueing behind other searches neither times it out nor triggers a hedge.
+            async with self.scheduler.slot(priority, model=model) as waited:
+                record.rate_limit_seconds = waited.rate_limit_seconds
+                record.queue_seconds = waited.queue_seconds
+                output, hedge_won = await asyncio.wait_for(
+                    hedged(attempt, hedge_delay, on_hedge, hedge_attempt),
+                    self.deadlines.per_search_seconds,
+                )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            record.failed = True
+            self._report_search_tail(stats)
+            return None
         except Exception:
+            record.failed = True
             return None
+        if hedge_won:
+            stats.hedge_wins += 1
+            self._report_search_tail(stats)
+        if self.search_cache is not None:
+            self.search_cache.set(cache_key, output)
+        return output
 
-    async def _write_report(self, query: str, search_results: Sequence[str]) -> FinancialReportData:
-        # Expose the specialist analysts as tools so the writer can invoke them inline
-        # and still produce the final FinancialReportData output.
-        fundamentals_tool = financials_agent.as_tool(
-            tool_name="fundamentals_analysis",
-            tool_description="Use to get a short write‑up of key financial metrics",
-            custom_output_extractor=_summary_extractor,
-        )
-        risk_tool = risk_agent.as_tool(
-            tool_name="risk_analysis",
-            tool_description="Use to get a short write‑up of potential red flags",
-            custom_output_extractor=_summary_extractor,
-        )
-        writer_with_tools = writer_agent.clone(tools=[fundamentals_tool, risk_tool])
+    async def _write_report(
+        self,
+        query: str,
+        search_results: Sequence[str],
+        on_text: Callable[[str], None] | None = None,
+    ) -> FinancialReportData:
         self.printer.update_item("writing", "Thinking about report...")
-        input_data = f"Original query: {query}\nSummarized search results: {search_results}"
-        result = Runner.run_streamed(writer_with_tools, input_data)
+        results = self._search_context(query, search_results)
+        input_data = f"Original query: {query}\nSummarized search results:\n{results}"
         update_messages = [
             "Planning report structure...",
             "Writing sections...",
@@ -120,16 +853,126 @@ class FinancialResearchManager:
         ]
         last_update = time.time()
         next_message = 0
-        async for _ in result.stream_events():
-            if time.time() - last_update > 5 and next_message < len(update_messages):
-                self.printer.update_item("writing", update_messages[next_message])
-                next_message += 1
-                last_update = time.time()
+        emitter = None
+        if self.report_stream is not None:
+            emitter = self.report_stream(_current_run_id.get() or gen_trace_id())
+        started = time.monotonic()
+        with self._stage("write") as record:
+            writer = self._route("write", self.agents.writer, input_data, record)
+            try:
+                # Malformed output is normally repaired locally; re-run only if that fails.
+                for attempt in range(2):
+                    result = Runner.run_streamed(writer, input_data, run_config=self.run_config)
+                    try:
+                        async for event in result.stream_events():
+                            if event.type == "raw_response_event" and isinstance(
+                                event.data, ResponseTextDeltaEvent
+                            ):
+                                if record.first_token_seconds is None:
+                                    record.first_token_seconds = time.monotonic() - started
+                                if on_text is not None:
+                                    on_text(event.data.delta)
+                                if emitter is not None:
+                                    emitter.feed(event.data.delta)
+                            if (
+                                time.time() - last_update > 5
+                                and next_message < len(update_messages)
+                            ):
+                                self.printer.update_item("writing", update_messages[next_message])
+                                next_message += 1
+                                last_update = time.time()
+                    except ModelBehaviorError:
+                        if attempt:
+                            raise
+                        record.add_usage(result)
+                        record.retries += 1
+                        if emitter is not None:
+                            emitter.restart()
+                        continue
+                    break
+            finally:
+                if emitter is not None:
+                    emitter.close()
+            record.add_usage(result)
+            report = await self._complete_output(result.final_output, FinancialReportData, record)
+        if emitter is not None and emitter.to_stdout:
+            self._streamed_to_stdout = report.markdown_report
+        if emitter is not None and emitter.first_token_seconds is not None:
+            self.printer.update_item(
+                "report_stream",
+                f"Streamed {emitter.chars_emitted} report characters, "
+                f"the first after {emitter.first_token_seconds:.1f}s",
+                is_done=True,
+            )
+        if self.tool_memo is not None:
+            with custom_span("Analyst tool memo", data=self.tool_memo.snapshot()):
+                pass
         self.printer.mark_item_done("writing")
-        return result.final_output_as(FinancialReportData)
+        return report
 
     async def _verify_report(self, report: FinancialReportData) -> VerificationResult:
         self.printer.update_item("verifying", "Verifying report...")
-        result = await Runner.run(verifier_agent, report.markdown_report)
+        with self._stage("verify") as record:
+            verifier = self._route("verify", self.agents.verifier, report.markdown_report, record)
+            verification = await self._run_structured(
+                verifier, report.markdown_report, VerificationResult, record
+            )
+        self.printer.mark_item_done("verifying")
+        return verification
+
+    async def _write_and_verify_sections(
+        self, query: str, search_results: Sequence[str]
+    ) -> tuple[FinancialReportData, VerificationResult]:
+        """
+        Stream the writer's output, split the markdown report into sections as they complete and
+        verify each one in parallel while the writer keeps going.
+        """
+        extractor = JsonStringFieldExtractor("markdown_report")
+        splitter = MarkdownSectionSplitter()
+        sections: list[str] = []
+        tasks: list[asyncio.Task[VerificationResult]] = []
+        num_verified = 0
+
+        def on_verified(_: asyncio.Task[VerificationResult]) -> None:
+            nonlocal num_verified
+            num_verified += 1
+            self.printer.update_item(
+                "verifying", f"Verifying sections... {num_verified}/{len(tasks)} done"
+            )
+
+        def start(new_sections: list[str]) -> None:
+            for section in new_sections:
+                sections.append(section)
+                task = asyncio.create_task(self._verify_section(section))
+                task.add_done_callback(on_verified)
+                tasks.append(task)
+
+        def on_text(delta: str) -> None:
+            start(splitter.feed(extractor.feed(delta)))
+
+        self.printer.update_item("verifying", "Verifying sections as they are written...")
+        try:
+            report = await self._write_report(query, search_results, on_text=on_text)
+            start(splitter.close())
+            if "".join(sections).strip() != report.markdown_report.strip():
+                # The streamed text didn't match the final report (e.g. nothing was streamed),
+                # so the sections can't stand in for it.
+                for task in tasks:
+                    task.cancel()
+                return report, await self._verify_report(report)
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
         self.printer.mark_item_done("verifying")
-        return result.final_output_as(VerificationResult)
\ No newline at end of file
+        return report, merge_verifications(list(zip(sections, results)))
+
+    async def _verify_section(self, section: str) -> VerificationResult:
+        input_data = (
+            "This is one section of a longer financial report; the other sections are checked "
+            "separately, so only flag problems within this section.\n\n" + section
+        )
+        with self._stage("verify_section") as record:
+            verifier = self._route("verify", self.agents.verifier, input_data, record)
+            return await self._run_structured(verifier, input_data, VerificationResult, record)
\ No newline at end of file
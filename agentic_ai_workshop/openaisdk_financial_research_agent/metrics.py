@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+@dataclass
+class StageRecord:
+    """One execution of one pipeline stage (a single search counts as one `search` record)."""
+
+    stage: str
+    run_id: str | None = None
+    model: str | None = None
+    """Set when the stage ran on a routed model."""
+
+    wall_seconds: float = 0.0
+    queue_seconds: float | None = None
+    """Time spent waiting for a scheduler slot; None for stages that don't go through one."""
+
+    rate_limit_seconds: float | None = None
+    """Time spent waiting for a rate-limit token before queueing for a slot."""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    retries: int = 0
+    """Extra attempts: search hedges, and stage re-runs after unusable structured output."""
+
+    repairs: int = 0
+    """Structured outputs fixed up locally instead of re-running the stage."""
+
+    model_fixes: int = 0
+    """Targeted model calls to fill in fields that could not be repaired locally."""
+
+    first_token_seconds: float | None = None
+    """For streamed stages, time from the start of the stage to the first output text."""
+
+    cache_hit: bool = False
+    failed: bool = False
+
+    def add_usage(self, result: Any) -> None:
+        """Add token usage from a `RunResult` / `RunResultStreaming`."""
+        usage = result.context_wrapper.usage
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+
+
+# The stage being executed, so code deep inside an agent run can add to its record.
+current_stage: ContextVar[StageRecord | None] = ContextVar("current_stage", default=None)
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class MetricsRegistry:
+    """
+    Collects per-stage latency, queueing, token, retry and cache metrics for the research
+    pipeline. Latency quantiles are computed over the most recent `window` records of each
+    stage; counters are cumulative for the life of the process.
+
+    Export with `to_prometheus()` (text exposition format) or `run_summary(run_id)`. If
+    `summary_path` is set, each finished run's summary is also appended there as a JSON line.
+    """
+
+    def __init__(
+        self, window: int = 1000, max_runs: int = 1000, summary_path: Path | None = None
+    ) -> None:
+        self.summary_path = summary_path
+        self._lock = threading.Lock()
+        self._wall: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._queue: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._rate_limit: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._first_token: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._counters: dict[tuple[str, str], float] = defaultdict(float)
+        self._runs: OrderedDict[str, list[StageRecord]] = OrderedDict()
+        self.max_runs = max_runs
+
+    @contextmanager
+    def stage(self, stage: str, run_id: str | None = None) -> Iterator[StageRecord]:
+        """Time a block as one execution of `stage`; fill in the yielded record as you go."""
+        record = StageRecord(stage, run_id)
+        token = current_stage.set(record)
+        started = time.monotonic()
+        try:
+            yield record
+        except BaseException:
+            record.failed = True
+            raise
+        finally:
+            record.wall_seconds = time.monotonic() - started
+            current_stage.reset(token)
+            self.record(record)
+
+    def record(self, record: StageRecord) -> None:
+        with self._lock:
+            self._wall[record.stage].append(record.wall_seconds)
+            counters = {
+                "count": 1,
+                "seconds": record.wall_seconds,
+                "input_tokens": record.input_tokens,
+                "output_tokens": record.output_tokens,
+                "retries": record.retries,
+                "repairs": record.repairs,
+                "model_fixes": record.model_fixes,
+                "cache_hits": int(record.cache_hit),
+                "failures": int(record.failed),
+            }
+            # The windows only give the quantiles; summaries' _sum and _count are cumulative.
+            if record.queue_seconds is not None:
+                self._queue[record.stage].append(record.queue_seconds)
+                counters["queue_count"] = 1
+                counters["queue_seconds"] = record.queue_seconds
+            if record.rate_limit_seconds is not None:
+                self._rate_limit[record.stage].append(record.rate_limit_seconds)
+                counters["rate_limit_count"] = 1
+                counters["rate_limit_seconds"] = record.rate_limit_seconds
+            if record.first_token_seconds is not None:
+                self._first_token[record.stage].append(record.first_token_seconds)
+                counters["first_token_count"] = 1
+                counters["first_token_seconds"] = record.first_token_seconds
+            for name, value in counters.items():
+                self._counters[(record.stage, name)] += value
+            if record.run_id is not None:
+                self._runs.setdefault(record.run_id, []).append(record)
+                while len(self._runs) > self.max_runs:
+                    self._runs.popitem(last=False)
+
+    def percentiles(self, stage: str) -> dict[str, float]:
+        with self._lock:
+            ordered = sorted(self._wall.get(stage, ()))
+        return {f"p{round(q * 100)}": _quantile(ordered, q) for q in QUANTILES}
+
+    def run_summary(self, run_id: str) -> dict[str, Any]:
+        """Totals per stage for one run, plus the raw records."""
+        with self._lock:
+            records = list(self._runs.get(run_id, ()))
+        stages: dict[str, dict[str, float]] = {}
+        for record in records:
+            totals = stages.setdefault(
+                record.stage,
+                {
+                    "count": 0,
+                    "wall_seconds": 0.0,
+                    "max_wall_seconds": 0.0,
+                    "queue_seconds": 0.0,
+                    "rate_limit_seconds": 0.0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "retries": 0,
+                    "repairs": 0,
+                    "model_fixes": 0,
+                    "cache_hits": 0,
+                    "failures": 0,
+                },
+            )
+            totals["count"] += 1
+            totals["wall_seconds"] += record.wall_seconds
+            totals["max_wall_seconds"] = max(totals["max_wall_seconds"], record.wall_seconds)
+            totals["queue_seconds"] += record.queue_seconds or 0.0
+            totals["rate_limit_seconds"] += record.rate_limit_seconds or 0.0
+            totals["input_tokens"] += record.input_tokens
+            totals["output_tokens"] += record.output_tokens
+            totals["retries"] += record.retries
+            totals["repairs"] += record.repairs
+            totals["model_fixes"] += record.model_fixes
+            totals["cache_hits"] += int(record.cache_hit)
+            totals["failures"] += int(record.failed)
+        return {
+            "run_id": run_id,
+            "stages": stages,
+            "records": [asdict(record) for record in records],
+        }
+
+    def finish_run(self, run_id: str) -> dict[str, Any]:
+        summary = self.run_summary(run_id)
+        if self.summary_path is not None:
+            self.summary_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.summary_path.open("a") as output:
+                output.write(json.dumps(summary) + "\n")
+        return summary
+
+    def to_prometheus(self, prefix: str = "financial_research") -> str:
+        lines: list[str] = []
+        with self._lock:
+            wall = {stage: sorted(values) for stage, values in self._wall.items()}
+            queue = {stage: sorted(values) for stage, values in self._queue.items()}
+            rate_limit = {stage: sorted(values) for stage, values in self._rate_limit.items()}
+            first_token = {stage: sorted(values) for stage, values in self._first_token.items()}
+            counters = dict(self._counters)
+
+        for name, samples, totals, help_text in (
+            ("stage_seconds", wall, "", "Wall time per stage execution."),
+            ("stage_queue_seconds", queue, "queue_", "Time spent waiting for a scheduler slot."),
+            (
+                "stage_rate_limit_seconds",
+                rate_limit,
+                "rate_limit_",
+                "Time spent waiting for a rate-limit token.",
+            ),
+            (
+                "stage_first_token_seconds",
+                first_token,
+                "first_token_",
+                "Time to the first streamed output text.",
+            ),
+        ):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} summary")
+            for stage, ordered in sorted(samples.items()):
+                if not ordered:
+                    continue
+                # Quantiles over the recent window; _sum and _count since startup.
+                for q in QUANTILES:
+                    lines.append(
+                        f'{prefix}_{name}{{stage="{stage}",quantile="{q}"}} '
+                        f"{_quantile(ordered, q):.6f}"
+                    )
+                total = counters[(stage, f"{totals}seconds")]
+                count = counters[(stage, f"{totals}count")]
+                lines.append(f'{prefix}_{name}_sum{{stage="{stage}"}} {total:.6f}')
+                lines.append(f'{prefix}_{name}_count{{stage="{stage}"}} {int(count)}')
+
+        for counter, help_text in (
+            ("input_tokens", "Model input tokens."),
+            ("output_tokens", "Model output tokens."),
+            ("retries", "Extra attempts made (search hedges and stage re-runs)."),
+            ("repairs", "Malformed structured outputs repaired locally."),
+            ("model_fixes", "Targeted model calls to complete partially repaired outputs."),
+            ("cache_hits", "Results served from a cache."),
+            ("failures", "Stage executions that failed or timed out."),
+        ):
+            lines.append(f"# HELP {prefix}_{counter}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            for (stage, name), value in sorted(counters.items()):
+                if name == counter:
+                    lines.append(f'{prefix}_{counter}_total{{stage="{stage}"}} {value:g}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import re
+import typing
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from agents import AgentOutputSchema, AgentOutputSchemaBase, ModelBehaviorError
+
+from metrics import current_stage
+
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text: str) -> tuple[str, str | None] | None:
+    """
+    Best-effort fix-up of almost-JSON model output: drops code fences and any text around the
+    first object, removes trailing commas, and closes a document that was cut off. A truncated
+    list item or key is dropped. A top-level string field cut off mid-value is kept (and closed)
+    but named in the result, since its value is incomplete. Returns the repaired JSON and the
+    cut-off field (or None), or None if there is no JSON object to work with.
+    """
+    text = _FENCE.sub("", text)
+    start = text.find("{")
+    if start < 0:
+        return None
+    out: list[str] = []
+    stack: list[str] = []
+    # Where the output can be cut and still be valid once the open containers are closed.
+    safe_len, safe_stack = 0, []
+    in_string = escaped = is_value = after_colon = False
+    key_start, key = 0, ""
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if is_value:
+                    safe_len, safe_stack = len(out), list(stack)
+                elif stack == ["{"]:
+                    key = "".join(out[key_start + 1 : -1])
+            continue
+        if char == '"':
+            in_string = True
+            is_value = stack[-1] == "[" or after_colon
+            key_start = len(out)
+            out.append(char)
+        elif char in "{[":
+            stack.append(char)
+            after_colon = False
+            out.append(char)
+            safe_len, safe_stack = len(out), list(stack)
+        elif char in "}]":
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not stack or _CLOSERS[stack.pop()] != char:
+                return None
+            out.append(char)
+            after_colon = False
+            safe_len, safe_stack = len(out), list(stack)
+            if not stack:
+                return "".join(out), None
+        elif char == ":":
+            after_colon = True
+            out.append(char)
+        elif char == ",":
+            # Whatever came before the comma was a complete value (numbers, true/false/null).
+            safe_len, safe_stack = len(out), list(stack)
+            after_colon = False
+            out.append(char)
+        else:
+            out.append(char)
+    cut_off = None
+    if in_string and is_value and stack == ["{"]:
+        # Cut off inside a top-level string field such as the report body: keep what was written.
+        if escaped:
+            out.pop()
+        safe_len, safe_stack = len(out) + 1, list(stack)
+        out.append('"')
+        cut_off = key
+    kept = "".join(out[:safe_len]).rstrip().rstrip(",")
+    return kept + "".join(_CLOSERS[opener] for opener in reversed(safe_stack)), cut_off
+
+
+def _list_item_type(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is list:
+        (item_type,) = typing.get_args(annotation) or (Any,)
+        return item_type
+    return None
+
+
+@dataclass
+class PartialOutput:
+    """
+    A structured output that was repaired except for `missing` fields, which have to be filled
+    in by the model (see `fin_agent/fixer_agent.py`) before `complete` can build the result.
+    """
+
+    output_type: type[BaseModel]
+    data: dict[str, Any]
+    missing: tuple[str, ...]
+
+    def fix_prompt(self) -> str:
+        return (
+            f"Partial {self.output_type.__name__}:\n{json.dumps(self.data, ensure_ascii=False)}\n"
+            f"Missing or invalid fields: {', '.join(self.missing)}"
+        )
+
+    def complete(self, fix: BaseModel) -> BaseModel:
+        return self.output_type.model_validate({**self.data, **fix.model_dump()})
+
+
+def repair_output(output_type: type[BaseModel], text: str) -> BaseModel | PartialOutput | None:
+    """
+    Repair and partially validate `text` as `output_type`. Invalid items of list fields are
+    dropped and optional fields take their defaults; required fields that are absent are left
+    for the fixer. Returns the validated model, a `PartialOutput` naming the fields that are
+    still wrong, or None if nothing usable could be recovered.
+
+    Output cut off in the middle of a string field (the report body, typically) returns None,
+    so the stage is re-run: the small fixer model has none of the stage's inputs and would
+    have to invent the rest of the text.
+    """
+    repaired = repair_json(text)
+    if repaired is None:
+        return None
+    repaired_json, cut_off = repaired
+    if cut_off is not None:
+        return None
+    try:
+        data = json.loads(repaired_json)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    known: dict[str, Any] = {}
+    for name, model_field in output_type.model_fields.items():
+        if name not in data:
+            continue
+        item_type = _list_item_type(model_field.annotation)
+        value = data[name]
+        if (
+            item_type is not None
+            and isinstance(value, list)
+            and isinstance(item_type, type)
+            and issubclass(item_type, BaseModel)
+        ):
+            value = [item for item in value if _is_valid(item_type, item)]
+        known[name] = value
+    try:
+        return output_type.model_validate(known)
+    except ValidationError as e:
+        bad = {str(error["loc"][0]) for error in e.errors() if error["loc"]}
+    if len(bad) == len(output_type.model_fields):
+        return None
+    data = {name: value for name, value in known.items() if name not in bad}
+    missing = tuple(name for name in output_type.model_fields if name in bad)
+    return PartialOutput(output_type, data, missing)
+
+
+def _is_valid(model: type[BaseModel], value: Any) -> bool:
+    try:
+        model.model_validate(value)
+    except ValidationError:
+        return False
+    return True
+
+
+class RepairingOutputSchema(AgentOutputSchemaBase):
+    """
+    The usual strict output schema, except that output which fails validation is repaired
+    locally (`repair_output`) instead of failing the run. Each repair is counted on the current
+    stage's metrics record. The run's final output may then be a `PartialOutput`, which the
+    manager completes with a targeted model call.
+    """
+
+    def __init__(self, output_type: type[BaseModel]) -> None:
+        self.output_type = output_type
+        self._schema = AgentOutputSchema(output_type)
+
+    def is_plain_text(self) -> bool:
+        return False
+
+    def name(self) -> str:
+        return self._schema.name()
+
+    def json_schema(self) -> dict[str, Any]:
+        return self._schema.json_schema()
+
+    def is_strict_json_schema(self) -> bool:
+        return self._schema.is_strict_json_schema()
+
+    def validate_json(self, json_str: str) -> Any:
+        try:
+            return self._schema.validate_json(json_str)
+        except ModelBehaviorError:
+            repaired = repair_output(self.output_type, json_str)
+            if repaired is None:
+                raise
+        record = current_stage.get()
+        if record is not None:
+            record.repairs += 1
+        return repaired
@@ -1,20 +1,53 @@
-from typing import Any
+import json
+import logging
+import sys
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Protocol, TextIO
 
 from rich.console import Console, Group
 from rich.live import Live
 from rich.spinner import Spinner
 
 
+class ProgressSink(Protocol):
+    """
+    Where the manager sends status updates. `Printer` renders them to a terminal; the other
+    implementations below cover headless use (logs, machine-readable events, or nothing).
+    """
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None: ...
+
+    def mark_item_done(self, item_id: str) -> None: ...
+
+    def remove_items(self, prefix: str) -> None: ...
+
+    def end(self) -> None: ...
+
+
 class Printer:
     """
     Simple wrapper to stream status updates. Used by the financial bot
     manager as it orchestrates planning, search and writing.
+
+    Updates only change the item table; the rich `Live` display re-renders it on its own
+    refresh timer (`refresh_per_second`), so a burst of updates during search fan-out costs
+    one render per tick rather than one per update.
     """
 
-    def __init__(self, console: Console) -> None:
-        self.live = Live(console=console)
+    def __init__(self, console: Console, refresh_per_second: float = 4) -> None:
         self.items: dict[str, tuple[str, bool]] = {}
         self.hide_done_ids: set[str] = set()
+        # The Live refresh thread reads `items` while the event loop writes it.
+        self._lock = threading.Lock()
+        self.live = Live(
+            console=console,
+            get_renderable=self._render,
+            refresh_per_second=refresh_per_second,
+        )
         self.live.start()
 
     def end(self) -> None:
@@ -26,21 +59,163 @@ class Printer:
     def update_item(
         self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
     ) -> None:
-        self.items[item_id] = (content, is_done)
-        if hide_checkmark:
-            self.hide_done_ids.add(item_id)
-        self.flush()
+        with self._lock:
+            self.items[item_id] = (content, is_done)
+            if hide_checkmark:
+                self.hide_done_ids.add(item_id)
 
     def mark_item_done(self, item_id: str) -> None:
-        self.items[item_id] = (self.items[item_id][0], True)
-        self.flush()
+        with self._lock:
+            self.items[item_id] = (self.items[item_id][0], True)
+
+    def remove_items(self, prefix: str) -> None:
+        with self._lock:
+            for item_id in [item_id for item_id in self.items if item_id.startswith(prefix)]:
+                del self.items[item_id]
+                self.hide_done_ids.discard(item_id)
 
     def flush(self) -> None:
+        """Render immediately instead of waiting for the next refresh tick."""
+        self.live.refresh()
+
+    def _render(self) -> Group:
         renderables: list[Any] = []
-        for item_id, (content, is_done) in self.items.items():
-            if is_done:
-                prefix = "✅ " if item_id not in self.hide_done_ids else ""
-                renderables.append(prefix + content)
-            else:
-                renderables.append(Spinner("dots", text=content))
-        self.live.update(Group(*renderables))
\ No newline at end of file
+        with self._lock:
+            for item_id, (content, is_done) in self.items.items():
+                if is_done:
+                    prefix = "✅ " if item_id not in self.hide_done_ids else ""
+                    renderables.append(prefix + content)
+                else:
+                    renderables.append(Spinner("dots", text=content))
+        return Group(*renderables)
+
+
+class LogPrinter:
+    """Writes one log line per status change; suited to servers and CI logs."""
+
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        self.logger = logger or logging.getLogger("financial_research")
+        self.items: dict[str, str] = {}
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        if self.items.get(item_id) == content and not is_done:
+            return
+        self.items[item_id] = content
+        self.logger.info("%s%s", "done: " if is_done else "", content)
+
+    def mark_item_done(self, item_id: str) -> None:
+        self.logger.info("done: %s", self.items.get(item_id, item_id))
+
+    def remove_items(self, prefix: str) -> None:
+        for item_id in [item_id for item_id in self.items if item_id.startswith(prefix)]:
+            del self.items[item_id]
+
+    def end(self) -> None:
+        pass
+
+
+class JsonPrinter:
+    """
+    Emits each status change as one JSON object per line, e.g.
+    `{"ts": 1718000000.0, "event": "update", "item": "searching", "content": "...", "done": false}`.
+    Defaults to stderr so it never mixes with the report printed on stdout.
+    """
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream or sys.stderr
+
+    def _emit(self, event: str, **fields: Any) -> None:
+        self.stream.write(json.dumps({"ts": time.time(), "event": event, **fields}) + "\n")
+        self.stream.flush()
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        self._emit("update", item=item_id, content=content, done=is_done)
+
+    def mark_item_done(self, item_id: str) -> None:
+        self._emit("done", item=item_id)
+
+    def remove_items(self, prefix: str) -> None:
+        self._emit("remove", prefix=prefix)
+
+    def end(self) -> None:
+        self._emit("end")
+
+
+class EventPrinter(JsonPrinter):
+    """The same events as `JsonPrinter`, handed to `on_event` as dicts instead of written out."""
+
+    def __init__(self, on_event: Callable[[dict[str, Any]], None]) -> None:
+        self.on_event = on_event
+
+    def _emit(self, event: str, **fields: Any) -> None:
+        self.on_event({"ts": time.time(), "event": event, **fields})
+
+
+class NullPrinter:
+    """Discards every update."""
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        pass
+
+    def mark_item_done(self, item_id: str) -> None:
+        pass
+
+    def remove_items(self, prefix: str) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+class ScopedPrinter:
+    """
+    A view of a progress sink that namespaces item ids and labels their content, so several
+    concurrent research runs can report into one display without overwriting each other.
+    """
+
+    def __init__(self, parent: ProgressSink, scope: str) -> None:
+        self.parent = parent
+        self.scope = scope
+
+    def _id(self, item_id: str) -> str:
+        return f"{self.scope}/{item_id}"
+
+    def update_item(
+        self, item_id: str, content: str, is_done: bool = False, hide_checkmark: bool = False
+    ) -> None:
+        self.parent.update_item(
+            self._id(item_id), f"[{self.scope}] {content}", is_done, hide_checkmark
+        )
+
+    def mark_item_done(self, item_id: str) -> None:
+        self.parent.mark_item_done(self._id(item_id))
+
+    def remove_items(self, prefix: str) -> None:
+        self.parent.remove_items(self._id(prefix))
+
+    def clear(self) -> None:
+        """Drop every item this scope added to the parent display."""
+        self.parent.remove_items(f"{self.scope}/")
+
+    def end(self) -> None:
+        # The parent display outlives any single scope.
+        pass
+
+
+def make_printer(kind: str, console: Console | None = None) -> ProgressSink:
+    """Build a sink by name: `rich`, `log`, `json` or `none`."""
+    if kind == "rich":
+        return Printer(console or Console())
+    if kind == "log":
+        return LogPrinter()
+    if kind == "json":
+        return JsonPrinter()
+    if kind == "none":
+        return NullPrinter()
+    raise ValueError(f"Unknown progress sink: {kind!r}")
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from fin_agent.planner_agent import FinancialSearchPlan
+from fin_agent.reviser_agent import RevisedSection
+from fin_agent.verifier_agent import VerificationResult
+from fin_agent.writer_agent import FinancialReportData
+from result_cache import make_key, normalize_query
+from section_verify import MarkdownSectionSplitter, section_title
+
+
+@dataclass(frozen=True)
+class StoredSearch:
+    query: str
+    result: str
+    fetched_at: float
+    """Unix time the result was searched for."""
+
+
+@dataclass(frozen=True)
+class StoredResearch:
+    """Everything kept from the last run of a query."""
+
+    query: str
+    plan: FinancialSearchPlan
+    report: FinancialReportData
+    verification: VerificationResult
+    searches: dict[str, StoredSearch]
+    """Keyed on the search query as planned."""
+
+    updated_at: float
+
+
+class ReportStore:
+    """
+    Keeps the plan, timestamped search results, report and verification of each query's latest
+    run in SQLite, so a repeat of the query can refresh only what went stale.
+
+    Queries are matched after `normalize_query`. Search results older than `freshness_seconds`
+    are searched again on the next run; fresher ones are reused as-is.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "tmp/financial_reports.db",
+        freshness_seconds: float = 20 * 60 * 60,
+    ) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.freshness_seconds = freshness_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            " query_key TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " plan TEXT NOT NULL,"
+            " report TEXT NOT NULL,"
+            " verification TEXT NOT NULL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS searches ("
+            " query_key TEXT NOT NULL,"
+            " search_query TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (query_key, search_query));"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return make_key("report", normalize_query(query))
+
+    def is_fresh(self, search: StoredSearch, now: float | None = None) -> bool:
+        now = time.time() if now is None else now
+        return now - search.fetched_at <= self.freshness_seconds
+
+    def load(self, query: str) -> StoredResearch | None:
+        key = self._key(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, plan, report, verification, updated_at FROM reports"
+                " WHERE query_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            searches = self._conn.execute(
+                "SELECT search_query, result, fetched_at FROM searches WHERE query_key = ?",
+                (key,),
+            ).fetchall()
+        stored_query, plan, report, verification, updated_at = row
+        return StoredResearch(
+            query=stored_query,
+            plan=FinancialSearchPlan.model_validate_json(plan),
+            report=FinancialReportData.model_validate_json(report),
+            verification=VerificationResult.model_validate_json(verification),
+            searches={
+                search_query: StoredSearch(search_query, result, fetched_at)
+                for search_query, result, fetched_at in searches
+            },
+            updated_at=updated_at,
+        )
+
+    def save(
+        self,
+        query: str,
+        plan: FinancialSearchPlan,
+        searches: Mapping[str, StoredSearch],
+        report: FinancialReportData,
+        verification: VerificationResult,
+    ) -> None:
+        """Replace the stored run of `query`, including its full set of search results."""
+        key = self._key(query)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reports"
+                " (query_key, query, plan, report, verification, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    query,
+                    plan.model_dump_json(),
+                    report.model_dump_json(),
+                    verification.model_dump_json(),
+                    time.time(),
+                ),
+            )
+            self._conn.execute("DELETE FROM searches WHERE query_key = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO searches (query_key, search_query, result, fetched_at)"
+                " VALUES (?, ?, ?, ?)",
+                [(key, s.query, s.result, s.fetched_at) for s in searches.values()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def _heading_key(text: str) -> str:
+    return re.sub(r"\W+", " ", section_title(text).casefold()).strip()
+
+
+def apply_revision(markdown: str, sections: Sequence[RevisedSection]) -> str:
+    """
+    Splice revised sections into a markdown report. Each revised section replaces the section
+    with the same heading; sections with a heading the report doesn't have are appended.
+    """
+    splitter = MarkdownSectionSplitter(min_chars=0)
+    existing = [text for text in splitter.feed(markdown) + splitter.close() if text.strip()]
+    revised = {_heading_key(section.heading): section.markdown for section in sections}
+    merged: list[str] = []
+    for section in existing:
+        replacement = revised.pop(_heading_key(section), None)
+        merged.append(section if replacement is None else replacement.rstrip("\n") + "\n\n")
+    merged.extend(text.rstrip("\n") + "\n\n" for text in revised.values())
+    return "".join(merged).rstrip("\n") + "\n"
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import socket
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import TextIO
+
+from section_verify import JsonStringFieldExtractor
+
+
+class MarkdownEmitter:
+    """
+    Forwards the writer's `markdown_report` to `sink` while the report is still being generated.
+
+    Feed it the raw JSON text deltas of the writer's structured output; the decoded markdown is
+    written out a line at a time, so at most `max_buffer_chars` of it (plus the extractor's short
+    search tail) is held here however long the report gets. `first_token_seconds` is the time
+    from creating the emitter to the first character of the report.
+    """
+
+    def __init__(
+        self, sink: TextIO, max_buffer_chars: int = 2048, close_sink: bool = False
+    ) -> None:
+        self.sink = sink
+        self.max_buffer_chars = max_buffer_chars
+        self.close_sink = close_sink
+        self.first_token_seconds: float | None = None
+        self.chars_emitted = 0
+        self._started = time.monotonic()
+        self._extractor = JsonStringFieldExtractor("markdown_report")
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._at_line_start = True
+
+    @property
+    def to_stdout(self) -> bool:
+        return self.sink is sys.stdout
+
+    def feed(self, delta: str) -> None:
+        text = self._extractor.feed(delta)
+        if not text:
+            return
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.monotonic() - self._started
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if "\n" in text or self._buffered >= self.max_buffer_chars:
+            self.flush()
+
+    def restart(self) -> None:
+        """The writer is starting over (its output was unusable): mark the break in the sink."""
+        self.flush()
+        if self.chars_emitted:
+            self.sink.write("\n\n---\n\n*The report is being regenerated.*\n\n")
+            self.sink.flush()
+        self._extractor = JsonStringFieldExtractor("markdown_report")
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self.sink.write(text)
+        self.sink.flush()
+        self._at_line_start = text.endswith("\n")
+        self.chars_emitted += self._buffered
+        self._buffer.clear()
+        self._buffered = 0
+
+    def close(self) -> None:
+        self.flush()
+        if not self._at_line_start:
+            self.sink.write("\n")
+            self.sink.flush()
+        if self.close_sink:
+            self.sink.close()
+
+
+def report_emitters(
+    target: str, max_buffer_chars: int = 2048
+) -> Callable[[str], MarkdownEmitter]:
+    """
+    An emitter factory for `FinancialResearchManager(report_stream=...)`, called with each run's
+    id. `target` is `-` for stdout, `tcp://host:port` to stream each report over its own
+    connection, or a file path. A path may contain `{run_id}`; a directory gets one
+    `<run_id>.md` per run.
+    """
+
+    def open_sink(run_id: str) -> MarkdownEmitter:
+        if target == "-":
+            return MarkdownEmitter(sys.stdout, max_buffer_chars)
+        if target.startswith("tcp://"):
+            host, _, port = target.removeprefix("tcp://").rpartition(":")
+            with socket.create_connection((host, int(port))) as connection:
+                # The file keeps the connection open until the emitter closes it.
+                sink = connection.makefile("w", encoding="utf-8")
+            return MarkdownEmitter(sink, max_buffer_chars, close_sink=True)
+        path = Path(target.format(run_id=run_id))
+        if path.is_dir():
+            path = path / f"{run_id}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return MarkdownEmitter(path.open("w"), max_buffer_chars, close_sink=True)
+
+    return open_sink
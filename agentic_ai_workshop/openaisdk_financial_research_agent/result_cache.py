@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+
+def normalize_query(text: str) -> str:
+    """Case-fold, drop punctuation and collapse whitespace so trivially different queries match."""
+    text = re.sub(r"['’]", "", text.casefold())
+    text = re.sub(r"[^\w\s.%$-]", " ", text)
+    return " ".join(text.split())
+
+
+def make_key(*parts: str | None) -> str:
+    """Content address for a cache entry: a stable hash of everything that affects the result."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed cache for agent outputs, backed by SQLite.
+
+    Entries expire after `ttl_seconds` and the table is kept to at most `max_entries` rows by
+    evicting the least recently used ones. Use `path=":memory:"` for a process-local cache.
+
+    Lookups only read: recency is tracked in memory and written in one batch on the next `set`
+    (or `close`, or once `max_pending_touches` hits pile up), and expired rows are deleted by
+    `set`, so the hot path never commits.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "tmp/financial_research_cache.db",
+        ttl_seconds: float = 6 * 60 * 60,
+        max_entries: int = 10_000,
+        max_pending_touches: int = 1_000,
+    ) -> None:
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_pending_touches = max_pending_touches
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.stats.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= self.max_pending_touches:
+                self._flush_touches()
+                self._conn.commit()
+            self.stats.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._touched.pop(key, None)
+            self._flush_touches()
+            self._conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE results SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats.evictions += overflow
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
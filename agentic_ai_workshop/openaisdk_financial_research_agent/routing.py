@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+
+from agents import Agent
+
+from context_packing import count_tokens
+from hedging import LatencyTracker
+
+# Share of the latency SLO each stage may use. When a stage starts it gets its share of whatever
+# time is left, relative to the stages still to come.
+STAGE_SHARES = {"plan": 0.1, "search": 0.3, "write": 0.45, "verify": 0.15}
+
+# Input size (in tokens) under which a stage moves one tier faster. Only stages whose input
+# size says something about how hard the call is are listed: the planner's prompt is just the
+# query and the section verifier's is one section, so they are always small.
+SMALL_INPUT_TOKENS = {"write": 1500, "revise": 1500, "verify": 1500}
+
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """
+    How `ModelRouter` picks a model for each call.
+
+    `tiers` lists the models from most capable (and slowest) to fastest. An agent starts at the
+    tier it is pinned to (a dated snapshot such as `gpt-4o-2024-08-06` counts as `gpt-4o`);
+    agents pinned to a model outside the list are never rerouted. For the stages in
+    `small_input_tokens`, inputs shorter than the stage's threshold move one tier faster, since
+    a writer or verifier with little material doesn't need the biggest model. After that,
+    while a model's observed `slo_quantile` latency would overrun the time the stage has left,
+    the next faster tier is used instead.
+    """
+
+    tiers: tuple[str, ...] = ("gpt-4.5-preview", "gpt-4o", "gpt-4o-mini")
+    small_input_tokens: dict[str, int] = field(default_factory=lambda: dict(SMALL_INPUT_TOKENS))
+    slo_seconds: float | None = None
+    slo_quantile: float = 0.95
+    stage_shares: dict[str, float] = field(default_factory=lambda: dict(STAGE_SHARES))
+
+    def tier_of(self, model: str) -> int | None:
+        for tier, name in enumerate(self.tiers):
+            if model == name or re.fullmatch(re.escape(name) + r"-\d{4}-\d{2}-\d{2}", model):
+                return tier
+        return None
+
+    def stage_budget(self, stage: str, remaining: float) -> float:
+        """The part of the `remaining` seconds that `stage` may spend."""
+        stages = list(self.stage_shares)
+        if stage not in self.stage_shares:
+            return remaining
+        still_to_run = sum(self.stage_shares[name] for name in stages[stages.index(stage) :])
+        return remaining * self.stage_shares[stage] / still_to_run
+
+
+class ModelRouter:
+    """
+    Picks a model tier per call from the input size, the time left in the request's latency SLO
+    and the latencies observed so far for each model. Share one router across runs so the
+    latency histograms warm up. Latencies are tracked per (stage, model), since a writer call
+    takes far longer than a planner call on the same model.
+    """
+
+    def __init__(self, policy: RoutingPolicy | None = None) -> None:
+        self.policy = policy or RoutingPolicy()
+        self.latencies: dict[tuple[str, str], LatencyTracker] = {}
+        # Rerouted copies of each agent, built once per (agent, model). The original is kept
+        # alongside so its id can't be reused.
+        self._clones: dict[tuple[int, str], tuple[Agent, Agent]] = {}
+
+    def record(self, stage: str, model: str, seconds: float) -> None:
+        self.latencies.setdefault((stage, model), LatencyTracker()).record(seconds)
+
+    def expected_latency(self, stage: str, model: str) -> float | None:
+        tracker = self.latencies.get((stage, model))
+        return tracker.quantile(self.policy.slo_quantile) if tracker is not None else None
+
+    def choose_model(
+        self, stage: str, model: str, input_text: str, budget: float | None = None
+    ) -> str:
+        tiers: Sequence[str] = self.policy.tiers
+        pinned = self.policy.tier_of(model)
+        if pinned is None:
+            return model
+        tier = pinned
+        small = self.policy.small_input_tokens.get(stage)
+        if small is not None and count_tokens(input_text, model) < small:
+            tier = min(tier + 1, len(tiers) - 1)
+
+        def name(tier: int) -> str:
+            # Keep the pinned snapshot unless we actually move tiers.
+            return model if tier == pinned else tiers[tier]
+
+        if budget is not None:
+            while tier < len(tiers) - 1:
+                expected = self.expected_latency(stage, name(tier))
+                if expected is None or expected <= budget:
+                    break
+                tier += 1
+        return name(tier)
+
+    def route(
+        self, stage: str, agent: Agent, input_text: str, budget: float | None = None
+    ) -> Agent:
+        """`agent`, or a copy of it running on a faster tier."""
+        if not isinstance(agent.model, str):
+            return agent
+        model = self.choose_model(stage, agent.model, input_text, budget)
+        if model == agent.model:
+            return agent
+        key = (id(agent), model)
+        if key not in self._clones:
+            self._clones[key] = (agent, agent.clone(model=model))
+        return self._clones[key][1]
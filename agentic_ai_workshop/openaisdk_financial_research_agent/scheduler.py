@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token-bucket settings for one model: `rate` requests per second, bursting to `burst`."""
+
+    rate: float
+    burst: int = 1
+
+
+@dataclass(frozen=True)
+class SlotWait:
+    """How long `SearchScheduler.slot` waited before the call could start."""
+
+    rate_limit_seconds: float
+    """Waiting for a rate-limit token, before joining the queue for a slot."""
+
+    queue_seconds: float
+    """Waiting for a concurrency slot."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket. Each request takes one token; tokens refill continuously at
+    `rate` per second up to `burst`.
+    """
+
+    def __init__(self, limit: RateLimit) -> None:
+        self.rate = limit.rate
+        self.capacity = float(limit.burst)
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        # The lock keeps waiters FIFO so one bucket never hands out more than `rate`.
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class SearchScheduler:
+    """
+    Shared admission control for agent calls.
+
+    A single scheduler can be handed to many `FinancialResearchManager` instances (or used by
+    many concurrent `run()` calls on one manager) so they all draw from one throughput budget:
+    - at most `max_concurrency` calls are in flight at once;
+    - calls against a model listed in `rate_limits` first wait for a token from that model's
+      bucket, without holding a slot, so calls to other models aren't held up behind them;
+    - when a slot frees up, the waiter with the lowest priority value goes first (ties are FIFO).
+
+    The manager uses the search's position in the plan as its priority, so the planner's first
+    searches start before its last ones.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 5,
+        rate_limits: dict[str, RateLimit] | None = None,
+        default_rate_limit: RateLimit | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.rate_limits = dict(rate_limits or {})
+        self.default_rate_limit = default_rate_limit
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._buckets: dict[str, TokenBucket] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def _bucket_for(self, model: str | None) -> TokenBucket | None:
+        key = model or "default"
+        if key not in self._buckets:
+            limit = self.rate_limits.get(key, self.default_rate_limit)
+            if limit is None:
+                return None
+            self._buckets[key] = TokenBucket(limit)
+        return self._buckets[key]
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self.max_concurrency and not self.queued:
+            self._in_flight += 1
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # If we were granted the slot just as we got cancelled, pass it on.
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; `_in_flight` is unchanged.
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0, model: str | None = None) -> AsyncIterator[SlotWait]:
+        """Wait for a rate-limit token, then a concurrency slot; yields how long each took."""
+        started = time.monotonic()
+        bucket = self._bucket_for(model)
+        if bucket is not None:
+            await bucket.acquire()
+        queued_at = time.monotonic()
+        await self._acquire(priority)
+        try:
+            yield SlotWait(queued_at - started, time.monotonic() - queued_at)
+        finally:
+            self._release()
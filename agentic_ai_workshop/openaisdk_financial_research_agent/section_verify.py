@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+
+from fin_agent.verifier_agent import VerificationResult
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+_HEADING = re.compile(r"^(#{1,6})\s")
+
+
+class JsonStringFieldExtractor:
+    """
+    Pulls the value of one string field out of a JSON object while it is still being streamed.
+
+    The writer's structured output arrives as raw JSON text deltas; feeding them here yields the
+    decoded `markdown_report` text incrementally, without waiting for the object to be complete.
+    Only a short tail of the raw text is kept while looking for the field.
+    """
+
+    def __init__(self, field: str) -> None:
+        self._key = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self._search_tail = ""
+        self._inside = False
+        self._finished = False
+        self._escape = ""
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def feed(self, chunk: str) -> str:
+        if self._finished:
+            return ""
+        if not self._inside:
+            self._search_tail += chunk
+            match = self._key.search(self._search_tail)
+            if match is None:
+                self._search_tail = self._search_tail[-256:]
+                return ""
+            self._inside = True
+            chunk = self._search_tail[match.end():]
+            self._search_tail = ""
+        return self._decode(chunk)
+
+    def _decode(self, chunk: str) -> str:
+        out: list[str] = []
+        for char in chunk:
+            if self._escape:
+                self._escape += char
+                if self._escape[1] == "u":
+                    if len(self._escape) == 6:
+                        out.append(chr(int(self._escape[2:], 16)))
+                        self._escape = ""
+                else:
+                    out.append(_ESCAPES.get(char, char))
+                    self._escape = ""
+            elif char == "\\":
+                self._escape = char
+            elif char == '"':
+                self._finished = True
+                break
+            else:
+                out.append(char)
+        return "".join(out)
+
+
+class MarkdownSectionSplitter:
+    """
+    Splits streamed markdown into sections at headings of level `max_level` or shallower.
+    A section is emitted once the next heading starts, so it is known to be complete.
+    Sections shorter than `min_chars` are merged into the following one to avoid many tiny
+    verifier calls.
+    """
+
+    def __init__(self, max_level: int = 3, min_chars: int = 400) -> None:
+        self.max_level = max_level
+        self.min_chars = min_chars
+        self._current = ""
+        self._partial_line = ""
+
+    def feed(self, text: str) -> list[str]:
+        sections: list[str] = []
+        *lines, self._partial_line = (self._partial_line + text).split("\n")
+        for line in lines:
+            heading = _HEADING.match(line)
+            if (
+                heading
+                and len(heading.group(1)) <= self.max_level
+                and len(self._current) >= self.min_chars
+            ):
+                sections.append(self._current)
+                self._current = ""
+            self._current += line + "\n"
+        return sections
+
+    def close(self) -> list[str]:
+        """Flush whatever is left once the stream has ended."""
+        last = self._current + self._partial_line
+        self._current = self._partial_line = ""
+        return [last] if last.strip() else []
+
+
+def section_title(section: str) -> str:
+    for line in section.splitlines():
+        if line.strip():
+            return line.lstrip("#").strip()
+    return "Untitled section"
+
+
+def merge_verifications(
+    sections: Sequence[tuple[str, VerificationResult]],
+) -> VerificationResult:
+    """Combine per-section results: verified only if every section is, issues listed per section."""
+    issues = [
+        f"{section_title(section)}: {result.issues}"
+        for section, result in sections
+        if not result.verified or result.issues.strip()
+    ]
+    return VerificationResult(
+        verified=all(result.verified for _, result in sections),
+        issues="\n\n".join(issues),
+    )
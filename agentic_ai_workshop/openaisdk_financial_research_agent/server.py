@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import json
+import re
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from manager import FinancialResearchManager
+from printer import NullPrinter
+from result_cache import ResultCache
+from service import Job, ResearchService, ServiceBusy
+from tool_memo import ToolMemo
+
+# Job API for the financial research agent, as a plain ASGI app (no web framework needed).
+# Run it with any ASGI server, e.g. `uvicorn server:app` or `python server.py --port 8000`.
+#
+#   POST /jobs               {"query": "..."}  -> 202 {"id", "status", "coalesced"}
+#                                                 429 when the wait queue is full
+#   GET  /jobs/{id}          job status, plus the report and verification once done
+#   GET  /jobs/{id}/events   progress as server-sent events, replayed from the start
+#   GET  /metrics            per-stage metrics in Prometheus text format
+#   GET  /healthz            running and queued job counts
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]{32})(/events)?$")
+# Sent on idle event streams so proxies don't time the connection out.
+_KEEPALIVE_SECONDS = 15.0
+
+
+async def _respond(
+    send: Send,
+    status: int,
+    body: Any,
+    content_type: str = "application/json",
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> None:
+    payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode()), *(headers or [])],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _stream_events(job: Job, receive: Receive, send: Send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+            ],
+        }
+    )
+    queue = job.subscribe()
+
+    async def wait_for_disconnect() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    disconnected = asyncio.ensure_future(wait_for_disconnect())
+    try:
+        while not disconnected.done():
+            try:
+                event = await asyncio.wait_for(queue.get(), _KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                keepalive = b": keepalive\n\n"
+                await send({"type": "http.response.body", "body": keepalive, "more_body": True})
+                continue
+            if event is None:
+                break
+            chunk = f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        disconnected.cancel()
+        job.unsubscribe(queue)
+
+
+class ResearchApp:
+    """ASGI app exposing a `ResearchService` over HTTP."""
+
+    def __init__(self, service_factory: Callable[[], ResearchService]) -> None:
+        # The service owns asyncio objects, so it is created inside the server's event loop.
+        self._service_factory = service_factory
+        self.service: ResearchService | None = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        if self.service is None:
+            self.service = self._service_factory()
+        await self._route(self.service, scope, receive, send)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.service = self._service_factory()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.service is not None:
+                    await self.service.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(
+        self, service: ResearchService, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        method, path = scope["method"], scope["path"]
+        if path == "/jobs" and method == "POST":
+            try:
+                query = json.loads(await _read_body(receive))["query"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                await _respond(send, 400, {"error": 'expected a JSON body {"query": "..."}'})
+                return
+            if not isinstance(query, str) or not query.strip():
+                await _respond(send, 400, {"error": "query must be a non-empty string"})
+                return
+            try:
+                job, coalesced = service.submit(query)
+            except ServiceBusy as e:
+                await _respond(send, 429, {"error": str(e)}, headers=[(b"retry-after", b"30")])
+                return
+            await _respond(
+                send,
+                202,
+                {"id": job.id, "status": job.status, "coalesced": coalesced},
+                headers=[(b"location", f"/jobs/{job.id}".encode())],
+            )
+            return
+        if method == "GET" and path == "/healthz":
+            await _respond(send, 200, {"running": service.running, "queued": service.queued})
+            return
+        if method == "GET" and path == "/metrics":
+            await _respond(
+                send,
+                200,
+                service.manager.metrics.to_prometheus(),
+                content_type="text/plain; version=0.0.4",
+            )
+            return
+        match = _JOB_PATH.match(path)
+        if method == "GET" and match:
+            job = service.get(match.group(1))
+            if job is None:
+                await _respond(send, 404, {"error": "no such job"})
+            elif match.group(2):
+                await _stream_events(job, receive, send)
+            else:
+                await _respond(send, 200, job.to_dict())
+            return
+        await _respond(send, 404, {"error": "not found"})
+
+
+def _default_service(
+    max_running: int = 4, max_queued: int = 32, context_budget: int | None = None
+) -> ResearchService:
+    manager = FinancialResearchManager(
+        printer=NullPrinter(),
+        search_cache=ResultCache(),
+        tool_memo=ToolMemo(ResultCache("tmp/analyst_tool_memo.db", ttl_seconds=60 * 60)),
+        context_budget=context_budget,
+    )
+    return ResearchService(manager, max_running=max_running, max_queued=max_queued)
+
+
+app = ResearchApp(_default_service)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Financial research job API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-running", type=int, default=4, help="jobs researched at once")
+    parser.add_argument("--max-queued", type=int, default=32, help="jobs allowed to wait")
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=None,
+        help="pack search results into this many tokens for the writer prompt (off by default)",
+    )
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Install uvicorn (or use another ASGI server) to serve `server:app`.")
+
+    service = functools.partial(
+        _default_service, args.max_running, args.max_queued, args.context_budget or None
+    )
+    uvicorn.run(ResearchApp(service), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from fin_agent.verifier_agent import VerificationResult
+from fin_agent.writer_agent import FinancialReportData
+from manager import FinancialResearchManager
+from printer import EventPrinter
+from result_cache import make_key, normalize_query
+
+
+class ServiceBusy(Exception):
+    """Raised by `ResearchService.submit` when the wait queue is full."""
+
+
+@dataclass
+class Job:
+    id: str
+    query: str
+    key: str
+    status: str = "queued"
+    """One of queued, running, done or failed."""
+
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    report: FinancialReportData | None = None
+    verification: VerificationResult | None = None
+    error: str | None = None
+    events: list[dict[str, Any]] = field(default_factory=list)
+    _subscribers: set[asyncio.Queue[dict[str, Any] | None]] = field(default_factory=set)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue[dict[str, Any] | None]:
+        """
+        A queue that gets every event so far, then each new one as it happens, then `None` once
+        the job has finished.
+        """
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.finished:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue[dict[str, Any] | None]) -> None:
+        self._subscribers.discard(queue)
+
+    def close(self) -> None:
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        self._subscribers.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "report": self.report.model_dump() if self.report else None,
+            "verification": self.verification.model_dump() if self.verification else None,
+            "error": self.error,
+        }
+
+
+class ResearchService:
+    """
+    Runs research queries as background jobs on one shared manager.
+
+    At most `max_running` jobs run at once and at most `max_queued` more may wait; beyond that
+    `submit` raises `ServiceBusy` rather than letting latency grow without bound. A query that
+    matches (after `normalize_query`) one already queued or running joins that job instead of
+    starting another. Finished jobs stay available for `retain_seconds`.
+    """
+
+    def __init__(
+        self,
+        manager: FinancialResearchManager,
+        max_running: int = 4,
+        max_queued: int = 32,
+        retain_seconds: float = 60 * 60,
+    ) -> None:
+        self.manager = manager
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.retain_seconds = retain_seconds
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._in_flight: dict[str, Job] = {}
+        self._slots = asyncio.Semaphore(max_running)
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def queued(self) -> int:
+        return sum(job.status == "queued" for job in self._in_flight.values())
+
+    @property
+    def running(self) -> int:
+        return sum(job.status == "running" for job in self._in_flight.values())
+
+    def submit(self, query: str) -> tuple[Job, bool]:
+        """Start (or join) a job for `query`. Returns the job and whether it was joined."""
+        self._prune()
+        key = make_key("job", normalize_query(query))
+        existing = self._in_flight.get(key)
+        if existing is not None:
+            return existing, True
+        # Count every unfinished job: one submitted this tick is still "queued" until its task
+        # starts, even if a slot is free for it.
+        limit = self.max_running + self.max_queued
+        if len(self._in_flight) >= limit:
+            raise ServiceBusy(f"Too many jobs running or waiting (limit {limit})")
+        job = Job(id=uuid.uuid4().hex, query=query, key=key)
+        self.jobs[job.id] = job
+        self._in_flight[key] = job
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job, False
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: Job) -> None:
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.publish({"ts": time.time(), "event": "status", "status": job.status})
+                job.report, job.verification = await self.manager.research(
+                    job.query, printer=EventPrinter(job.publish)
+                )
+            job.status = "done"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            if not job.finished:
+                # Cancelled, e.g. at shutdown.
+                job.status = "failed"
+                job.error = "cancelled"
+            job.finished_at = time.time()
+            del self._in_flight[job.key]
+            job.publish({"ts": job.finished_at, "event": "status", "status": job.status})
+            job.close()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retain_seconds
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
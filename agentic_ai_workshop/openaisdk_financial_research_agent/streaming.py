@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+_SENTENCE_GAP = re.compile(r"(?<=[.!?])([ \t]+)")
+# Lines kept or dropped whole: list items, headings, quotes. Tables are kept or dropped whole.
+_STRUCTURED_LINE = re.compile(r"\s*(?:[-*+]\s|\d+[.)]\s|#|>)")
+_TABLE_ROW = re.compile(r"\s*\|")
+
+
+@dataclass(frozen=True)
+class StreamingConfig:
+    """
+    Controls the streaming pipeline: the writer starts as soon as `quorum` (a fraction of the
+    planned searches) have returned a summary, or after `deadline_seconds`, whichever comes first.
+    Searches still running at that point are cancelled.
+    """
+
+    quorum: float = 0.7
+    deadline_seconds: float = 45.0
+
+    def quorum_count(self, num_searches: int) -> int:
+        return max(1, math.ceil(self.quorum * num_searches))
+
+
+def split_blocks(text: str) -> list[str]:
+    """Split markdown into whole tables and single non-blank lines (list items, paragraphs...)."""
+    blocks: list[str] = []
+    table: list[str] = []
+    for line in text.split("\n"):
+        if _TABLE_ROW.match(line):
+            table.append(line.strip())
+            continue
+        if table:
+            blocks.append("\n".join(table))
+            table = []
+        if line.strip():
+            blocks.append(line.rstrip())
+    if table:
+        blocks.append("\n".join(table))
+    return blocks
+
+
+def _fingerprint(sentence: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", sentence.casefold()).split())
+
+
+def _units(text: str) -> list[tuple[str, str]]:
+    """
+    Split markdown into (unit, separator) pairs that join back into `text`: a table, a list
+    item or heading line, or one sentence of a prose line.
+    """
+    lines = text.split("\n")
+    units: list[tuple[str, str]] = []
+    i = 0
+    while i < len(lines):
+        if _TABLE_ROW.match(lines[i]):
+            end = i
+            while end < len(lines) and _TABLE_ROW.match(lines[end]):
+                end += 1
+            units.append(("\n".join(lines[i:end]), "\n"))
+            i = end
+            continue
+        line = lines[i]
+        if not line.strip() or _STRUCTURED_LINE.match(line):
+            units.append((line, "\n"))
+        else:
+            parts = _SENTENCE_GAP.split(line)
+            units.extend(zip(parts[::2], [*parts[1::2], "\n"]))
+        i += 1
+    return units
+
+
+class PreSynthesizer:
+    """
+    Condenses search summaries incrementally as they arrive from the search queue.
+
+    Any sentence, list item or table already contributed by an earlier summary is dropped, so
+    overlapping coverage (the same headline figures quoted by several searches) only reaches
+    the writer once. The rest keeps its line breaks, lists and tables.
+    """
+
+    def __init__(self) -> None:
+        self._seen: set[str] = set()
+        self._digests: list[str] = []
+
+    def add(self, summary: str) -> None:
+        kept: list[str] = []
+        has_content = False
+        for unit, separator in _units(summary):
+            key = _fingerprint(unit)
+            if key in self._seen:
+                continue
+            if key:
+                self._seen.add(key)
+                has_content = True
+            # Blank lines and table rules (no words) are layout; keep them.
+            kept.append(unit + separator)
+        if has_content:
+            digest = re.sub(r"[ \t]+\n", "\n", "".join(kept))
+            self._digests.append(re.sub(r"\n{3,}", "\n\n", digest).strip())
+
+    def condensed(self) -> list[str]:
+        return list(self._digests)
+
+    def __len__(self) -> int:
+        return len(self._digests)
@@ -0,0 +1,65 @@
+import asyncio
+
+from agents import Agent, FunctionTool
+
+from tool_memo import ToolMemo
+
+# Run from this directory: `python -m pytest test_tool_memo.py`
+
+
+def _flaky_tool(outcomes: list[str | Exception]) -> tuple[FunctionTool, list[str]]:
+    calls: list[str] = []
+
+    async def invoke(ctx: object, raw_input: str) -> str:
+        calls.append(raw_input)
+        await asyncio.sleep(0.01)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    tool = FunctionTool(
+        name="fundamentals_analysis",
+        description="",
+        params_json_schema={},
+        on_invoke_tool=invoke,
+    )
+    return tool, calls
+
+
+def test_failed_call_is_reported_but_not_memoized() -> None:
+    async def scenario() -> None:
+        tool, calls = _flaky_tool([RuntimeError("model unavailable"), "Revenue grew 4%."])
+        memo = ToolMemo()
+        memoized = memo.wrap(tool, Agent(name="FundamentalsAnalystAgent", instructions="x"))
+
+        failed = await memoized.on_invoke_tool(None, '{"input": "ACME"}')
+        assert "error occurred" in failed
+        assert memo.failures == 1
+        assert len(memo.cache) == 0
+
+        # The failure was not replayed: the next call runs the tool again and memoizes that.
+        assert await memoized.on_invoke_tool(None, '{"input": "ACME"}') == "Revenue grew 4%."
+        assert await memoized.on_invoke_tool(None, '{"input": "ACME"}') == "Revenue grew 4%."
+        assert len(calls) == 2
+        assert memo.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_joined_callers_get_the_failure_message() -> None:
+    async def scenario() -> None:
+        tool, calls = _flaky_tool([RuntimeError("model unavailable")])
+        memo = ToolMemo()
+        memoized = memo.wrap(tool, Agent(name="RiskAnalystAgent", instructions="x"))
+
+        results = await asyncio.gather(
+            memoized.on_invoke_tool(None, '{"input": "ACME"}'),
+            memoized.on_invoke_tool(None, '{"input":  "ACME"}'),
+        )
+        assert results[0] == results[1]
+        assert "error occurred" in results[0]
+        assert len(calls) == 1
+        assert len(memo.cache) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+from typing import Any
+
+from agents import Agent, FunctionTool, custom_span, default_tool_error_function
+
+from result_cache import ResultCache, make_key
+
+
+def canonical_input(raw: str) -> str:
+    """Canonical form of a tool's JSON arguments: sorted keys, no whitespace, trimmed strings."""
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        return raw.strip()
+
+    def trim(item: Any) -> Any:
+        if isinstance(item, str):
+            return " ".join(item.split())
+        if isinstance(item, dict):
+            return {key: trim(val) for key, val in item.items()}
+        if isinstance(item, list):
+            return [trim(val) for val in item]
+        return item
+
+    return json.dumps(trim(value), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class ToolMemo:
+    """
+    Memoizes agent-as-tool calls such as `fundamentals_analysis` and `risk_analysis`.
+
+    Results are keyed on the tool, the wrapped agent's instructions and model, and a hash of the
+    canonicalized input. Identical calls that overlap in time share one underlying agent run
+    (single-flight); if the caller running it is cancelled, the callers that joined it run the
+    call again themselves. By default results live in memory for the life of the process; pass a
+    file-backed `ResultCache` to keep them across runs, subject to its TTL.
+    """
+
+    def __init__(self, cache: ResultCache | None = None) -> None:
+        self.cache = cache or ResultCache(":memory:")
+        self._in_flight: dict[str, asyncio.Future[Any]] = {}
+        self.calls = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "hit_rate": (self.hits + self.coalesced) / self.calls if self.calls else 0.0,
+        }
+
+    def wrap(self, tool: FunctionTool, agent: Agent) -> FunctionTool:
+        """
+        Return a copy of `tool` whose invocations go through this memo. Build `tool` with
+        `failure_error_function=None` so failures raise here instead of coming back as an
+        error message that would be memoized like a result.
+        """
+        invoke = tool.on_invoke_tool
+        model = agent.model if isinstance(agent.model, str) else None
+
+        async def memoized(ctx: Any, raw_input: str) -> Any:
+            key = make_key(
+                "tool", tool.name, str(agent.instructions), model, canonical_input(raw_input)
+            )
+            self.calls += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                with custom_span(f"Memo hit: {tool.name}", data=self.snapshot()):
+                    return cached
+            while (shared := self._in_flight.get(key)) is not None:
+                with custom_span(f"Memo coalesced: {tool.name}", data=self.snapshot()):
+                    # Unlike awaiting it, waiting leaves the shared call running if this
+                    # caller is cancelled.
+                    await asyncio.wait([shared])
+                if not shared.cancelled():
+                    self.coalesced += 1
+                    return shared.result()
+                # The caller running it was cancelled, not this one: run it (or join a newer run).
+
+            future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                result = await invoke(ctx, raw_input)
+            except Exception as e:
+                # Tell the model the call failed, as the Agents SDK would, but don't memoize it:
+                # the next call tries again.
+                self.failures += 1
+                result = default_tool_error_function(ctx, e)
+                future.set_result(result)
+                return result
+            except BaseException:
+                future.cancel()
+                raise
+            else:
+                future.set_result(result)
+                self.cache.set(key, str(result))
+                return result
+            finally:
+                del self._in_flight[key]
+
+        memoized_tool = copy.copy(tool)
+        memoized_tool.on_invoke_tool = memoized
+        return memoized_tool